@@ -1,31 +1,215 @@
 from qdrant_client import QdrantClient, models
+from google.api_core import exceptions as api_exceptions
 import google.generativeai as gemini_client
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import atexit
+import hashlib
 import os
-from typing import List, Optional
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Union
 import logging
+from ..chunker import estimate_tokens
+from .embedding_cache import EmbeddingCache, embedding_cache
+from .local_embeddings import HashingEmbedder
+from .local_store import LocalVectorStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto")  # gemini, hashing (offline), or auto: gemini when a key is set
+EMBEDDING_MODEL = "models/embedding-001"
+EMBEDDING_DIMENSION = 768
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # Texts per API call (the API allows 100)
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))  # Batch calls in flight, shared by all sessions
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "2"))
+EMBEDDING_RETRY_DELAY = 0.5  # Seconds before the first retry, doubled after each attempt
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "20"))  # Seconds per API call
+
+# Errors caused by the request itself; retrying the same batch cannot help
+NON_RETRYABLE_ERRORS = (
+    api_exceptions.InvalidArgument,
+    api_exceptions.PermissionDenied,
+    api_exceptions.Unauthenticated,
+    api_exceptions.NotFound,
+    ValueError
+)
+
+QDRANT_URL = os.getenv("QDRANT_URL")  # Qdrant server; when unset the embedded LocalVectorStore is used
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "cache/vectors.sqlite3")
+QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "studentbuddy_context")
+CONTEXT_TTL = int(os.getenv("CONTEXT_TTL", str(24 * 60 * 60)))  # Seconds session context is kept after its last write
+CONTEXT_CLEANUP_INTERVAL = int(os.getenv("CONTEXT_CLEANUP_INTERVAL", str(10 * 60)))
+TENANT_FIELDS = ("user_id", "document_id", "session_id")
+
+_embedding_threads = ThreadPoolExecutor(max_workers=EMBEDDING_CONCURRENCY, thread_name_prefix="embedding")
+
+
+@dataclass
+class EmbeddingResult:
+    """
+    Embeddings for a list of texts, in input order.
+
+    ``embeddings[i]`` is None when text ``i`` could not be embedded, and
+    ``errors[i]`` says why.
+    """
+    embeddings: List[Optional[List[float]]]
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> List[int]:
+        return sorted(self.errors)
+
+
+VectorStore = Union[QdrantClient, LocalVectorStore]
+
+_client: Optional[VectorStore] = None
+_client_lock = threading.Lock()
+_collections = set()  # Collections created or checked by this process
+_last_cleanup = 0.0
+
+
+def get_vector_store() -> VectorStore:
+    """
+    The process-wide vector store shared by every QdrantMemory.
+
+    Connects to the Qdrant server at QDRANT_URL when it is set, otherwise
+    opens the embedded store at VECTOR_STORE_PATH, which all worker
+    processes on the host can share.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            if QDRANT_URL:
+                _client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+            else:
+                _client = LocalVectorStore(VECTOR_STORE_PATH)
+        return _client
+
+
+@atexit.register
+def close_vector_store():
+    """Close the shared vector store client."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+            _collections.clear()
+
+
+def ensure_collection(client: VectorStore, collection_name: str, vector_size: int):
+    """
+    Create ``collection_name`` with payload indexes if it does not exist yet.
+
+    The tenant ids get keyword indexes so filtered searches only touch one
+    tenant's points, and ``created_at`` gets a float index for TTL cleanup.
+    """
+    with _client_lock:
+        if collection_name in _collections:
+            return
+        if not client.collection_exists(collection_name):
+            client.create_collection(
+                collection_name=collection_name,
+                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
+            )
+            for field_name in TENANT_FIELDS:
+                client.create_payload_index(collection_name, field_name, models.PayloadSchemaType.KEYWORD)
+            client.create_payload_index(collection_name, "created_at", models.PayloadSchemaType.FLOAT)
+        _collections.add(collection_name)
+
+
+def cleanup_expired_context(ttl: int = CONTEXT_TTL, now: Optional[float] = None) -> int:
+    """
+    Delete points last written more than ``ttl`` seconds ago.
+
+    Returns the number of collections that were cleaned.
+    """
+    global _last_cleanup
+    client = get_vector_store()
+    now = time.time() if now is None else now
+    expired = models.Filter(must=[models.FieldCondition(key="created_at", range=models.Range(lt=now - ttl))])
+    with _client_lock:
+        _last_cleanup = now
+        collection_names = list(_collections)
+    for collection_name in collection_names:
+        try:
+            client.delete(collection_name=collection_name, points_selector=models.FilterSelector(filter=expired))
+        except Exception as e:
+            logger.error(f"Error cleaning up expired context in {collection_name}: {e}")
+    return len(collection_names)
+
+
+def pack_context(parts: Iterable[str], max_tokens: int) -> str:
+    """
+    Join ``parts`` in order under a "Relevant context:" header, keeping the
+    estimated size within ``max_tokens``. A part that does not fit is
+    skipped so that a shorter one after it can still use the space.
+    """
+    packed = []
+    used = 0
+    for part in parts:
+        tokens = estimate_tokens(part)
+        if used + tokens > max_tokens:
+            continue
+        packed.append(part)
+        used += tokens
+
+    if packed:
+        return "Relevant context:\n" + "\n\n".join(packed) + "\n\n"
+    return ""
+
+
+def _maybe_cleanup():
+    # Cleanup is lazy: the first QdrantMemory after each interval runs it
+    if time.time() - _last_cleanup >= CONTEXT_CLEANUP_INTERVAL:
+        cleanup_expired_context()
+
+
 class QdrantMemory:
     """
     A class to manage a Qdrant memory instance.
     This class is used to interact with a Qdrant database for storing and retrieving context.
+
+    Embeddings come from Gemini or, offline, from a local HashingEmbedder
+    (see EMBEDDING_BACKEND). All sessions share one collection per backend
+    and vector size in the process-wide store. Every point carries its session, user and document ids, and
+    searches are filtered to the session (and user, when given), so one
+    session never sees another's context. Points expire CONTEXT_TTL seconds
+    after they were last written.
     """
 
-    def __init__(self, session_id: str, gemini_api_key: Optional[str] = None):
-        self.client = QdrantClient(url=":memory:")
-        self.collection_name = f"temp_collection_{session_id}"
+    def __init__(
+        self,
+        session_id: str,
+        gemini_api_key: Optional[str] = None,
+        cache: Optional[EmbeddingCache] = embedding_cache,
+        user_id: Optional[str] = None,
+        document_id: Optional[str] = None,
+        embedding_backend: str = EMBEDDING_BACKEND
+    ):
+        self.cache = cache
+        self.client = get_vector_store()
+        self.session_id = str(session_id)
+        self.user_id = str(user_id) if user_id is not None else None
+        self.document_id = str(document_id) if document_id is not None else None
         
         # Configure Gemini API
         api_key = gemini_api_key or os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            logger.warning("GEMINI_API_KEY not provided. Using placeholder embeddings.")
-            self.use_gemini = False
-        else:
+        if embedding_backend not in ("auto", "gemini", "hashing"):
+            raise ValueError(f"Unknown embedding backend: {embedding_backend}")
+        if embedding_backend == "gemini" and not api_key:
+            logger.warning("GEMINI_API_KEY not provided. Using local hashing embeddings.")
+        self.use_gemini = embedding_backend != "hashing" and bool(api_key)
+        if self.use_gemini:
             gemini_client.configure(api_key=api_key)
-            self.use_gemini = True
+            self.local_embedder = None
+        else:
+            self.local_embedder = HashingEmbedder()
         
         self._create_collection()
 
@@ -33,13 +217,29 @@ class QdrantMemory:
         """
         Create a collection in the Qdrant database if it does not already exist.
         """
-        # Gemini embedding dimension is 768, fallback to 3 for placeholder
-        vector_size = 768 if self.use_gemini else 3
-        
-        self.client.recreate_collection(
-            collection_name=self.collection_name,
-            vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
-        )
+        # Vectors from different backends are not comparable, so each gets its own collection
+        if self.use_gemini:
+            self.collection_name = f"{QDRANT_COLLECTION}_gemini_{EMBEDDING_DIMENSION}"
+            vector_size = EMBEDDING_DIMENSION
+        else:
+            self.collection_name = f"{QDRANT_COLLECTION}_{self.local_embedder.name}"
+            vector_size = self.local_embedder.dimension
+
+        ensure_collection(self.client, self.collection_name, vector_size)
+        _maybe_cleanup()
+
+    def _tenant_filter(self, document_id: Optional[str] = None) -> models.Filter:
+        conditions = [models.FieldCondition(key="session_id", match=models.MatchValue(value=self.session_id))]
+        if self.user_id is not None:
+            conditions.append(models.FieldCondition(key="user_id", match=models.MatchValue(value=self.user_id)))
+        if document_id is not None:
+            conditions.append(models.FieldCondition(key="document_id", match=models.MatchValue(value=str(document_id))))
+        return models.Filter(must=conditions)
+
+    def _point_id(self, text: str, document_id: Optional[str]) -> str:
+        # Stable per session, document and text, so re-adding the same text overwrites its point
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.session_id}/{document_id}/{digest}"))
 
     def upsert(self, points: List[models.PointStruct]):
         """
@@ -55,135 +255,248 @@ class QdrantMemory:
             logger.error(f"Error upserting points: {e}")
             raise
 
-    def search(self, query_vector: List[float], limit: int = 5):
+    def search(self, query_vector: List[float], limit: int = 5, document_id: Optional[str] = None):
         """
-        Search for similar points in the Qdrant collection.
+        Search for similar points in this session's context.
         """
         try:
-            return self.client.search(
+            return self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_vector,
+                query=query_vector,
+                query_filter=self._tenant_filter(document_id),
                 limit=limit
-            )
+            ).points
         except Exception as e:
             logger.error(f"Error searching collection: {e}")
             raise
     
     def clear(self):
         """
-        Clear the Qdrant collection.
+        Delete this session's points from the shared collection.
         """
         try:
-            self.client.delete_collection(self.collection_name)
-            logger.info(f"Successfully cleared collection {self.collection_name}")
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(filter=self._tenant_filter())
+            )
+            logger.info(f"Successfully cleared session {self.session_id} from collection {self.collection_name}")
         except Exception as e:
             logger.error(f"Error clearing collection: {e}")
             raise
 
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
         """
-        Generate embeddings for a list of texts using Google Gemini embedding model.
+        Embed ``texts`` with a single API call.
+
+        This is the only method that talks to the embedding service, so
+        subclasses and benchmarks can swap the backend by overriding it.
+        """
+        title = "StudentBuddy Context" if task_type == "retrieval_document" else None
+        result = gemini_client.embed_content(
+            model=EMBEDDING_MODEL,
+            content=texts,
+            task_type=task_type,
+            title=title,
+            # Retries happen per batch in _embed_with_retry, not inside the SDK
+            request_options={"timeout": EMBEDDING_TIMEOUT, "retry": None}
+        )
+        embeddings = result['embedding']
+        if len(embeddings) != len(texts):
+            raise RuntimeError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+        return embeddings
+
+    def _embed_with_retry(self, texts: List[str], task_type: str) -> List[List[float]]:
+        delay = EMBEDDING_RETRY_DELAY
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            try:
+                return self._embed_batch(texts, task_type)
+            except NON_RETRYABLE_ERRORS:
+                raise
+            except Exception as e:
+                if attempt == EMBEDDING_MAX_RETRIES:
+                    raise
+                logger.warning(f"Embedding batch of {len(texts)} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+                delay *= 2
+
+    def _embed_chunk(self, texts: List[str], offset: int, task_type: str, result: EmbeddingResult):
+        """
+        Embed one batch into ``result``, recording failures per item.
+
+        A batch the API rejects as an invalid argument is split in half
+        until the bad texts are isolated, so one oversized chunk does not
+        fail its neighbours. Any other error, including auth and
+        configuration errors that no smaller batch would fix, fails the
+        whole batch.
         """
-        if not self.use_gemini:
-            # Fallback to placeholder embeddings
-            logger.warning("Using placeholder embeddings. Set GEMINI_API_KEY for proper embeddings.")
-            return [[0.0, 0.0, 0.0] for _ in texts]
-        
         try:
-            embeddings = []
-            for text in texts:
-                result = gemini_client.embed_content(
-                    model="models/embedding-001",
-                    content=text,
-                    task_type="retrieval_document",
-                    title="StudentBuddy Context"
-                )
-                embeddings.append(result['embedding'])
-            
-            logger.info(f"Generated embeddings for {len(texts)} texts")
-            return embeddings
-            
+            embeddings = self._embed_with_retry(texts, task_type)
+        except api_exceptions.InvalidArgument as e:
+            if len(texts) > 1:
+                middle = len(texts) // 2
+                self._embed_chunk(texts[:middle], offset, task_type, result)
+                self._embed_chunk(texts[middle:], offset + middle, task_type, result)
+                return
+            result.errors[offset] = str(e)
+            return
         except Exception as e:
-            logger.error(f"Error generating embeddings: {e}")
-            # Fallback to placeholder embeddings if Gemini fails
-            logger.warning("Falling back to placeholder embeddings due to Gemini API error")
-            return [[0.0] * 768 for _ in texts]  # 768-dimensional zero vectors
+            for index in range(offset, offset + len(texts)):
+                result.errors[index] = str(e)
+            return
+        result.embeddings[offset:offset + len(texts)] = embeddings
 
-    def generate_query_embedding(self, query: str) -> List[float]:
+    def embed_texts(self, texts: List[str], task_type: str = "retrieval_document") -> EmbeddingResult:
         """
-        Generate embedding for a query text using Google Gemini embedding model.
+        Embed ``texts`` in batches of EMBEDDING_BATCH_SIZE.
+
+        Texts found in the embedding cache, and repeats within ``texts``, are
+        not sent again. Batches run concurrently on a pool shared by all
+        sessions, so at most EMBEDDING_CONCURRENCY calls are in flight
+        process-wide. Each batch is retried on its own, and texts that still
+        fail are reported in the result instead of raising.
         """
+        result = EmbeddingResult(embeddings=[None] * len(texts))
+        if not texts:
+            return result
+
         if not self.use_gemini:
-            logger.warning("Using placeholder query embedding. Set GEMINI_API_KEY for proper embeddings.")
-            return [0.0, 0.0, 0.0]
-        
-        try:
-            result = gemini_client.embed_content(
-                model="models/embedding-001",
-                content=query,
-                task_type="retrieval_query",
-                title="StudentBuddy Query"
-            )
-            return result['embedding']
-            
-        except Exception as e:
-            logger.error(f"Error generating query embedding: {e}")
-            # Fallback to placeholder embedding if Gemini fails
-            return [0.0] * 768  # 768-dimensional zero vector
+            # Local vectors are cheaper to compute than to read back from the cache
+            result.embeddings = []
+            for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+                result.embeddings.extend(self.local_embedder.encode(texts[start:start + EMBEDDING_BATCH_SIZE]).tolist())
+            return result
+
+        if self.cache is not None:
+            result.embeddings = self.cache.get_many(texts, EMBEDDING_MODEL, task_type)
+
+        positions: Dict[str, List[int]] = {}  # Text still to embed -> its indices in ``texts``
+        for index, (text, embedding) in enumerate(zip(texts, result.embeddings)):
+            if embedding is None:
+                positions.setdefault(text, []).append(index)
+        if not positions:
+            return result
 
-    def add_context(self, texts: List[str], metadata: Optional[List[dict]] = None):
+        pending = list(positions)
+        fetched = EmbeddingResult(embeddings=[None] * len(pending))
+        futures = [
+            _embedding_threads.submit(self._embed_chunk, pending[start:start + EMBEDDING_BATCH_SIZE], start, task_type, fetched)
+            for start in range(0, len(pending), EMBEDDING_BATCH_SIZE)
+        ]
+        for future in futures:
+            future.result()
+
+        for text, embedding, indices in zip(pending, fetched.embeddings, positions.values()):
+            for index in indices:
+                result.embeddings[index] = embedding
+        for pending_index, error in fetched.errors.items():
+            for index in positions[pending[pending_index]]:
+                result.errors[index] = error
+
+        if self.cache is not None:
+            embedded = [(text, embedding) for text, embedding in zip(pending, fetched.embeddings) if embedding is not None]
+            if embedded:
+                self.cache.put_many(
+                    [text for text, _ in embedded], EMBEDDING_MODEL, task_type,
+                    [embedding for _, embedding in embedded]
+                )
+
+        if result.errors:
+            logger.error(f"Could not embed {len(result.errors)} of {len(texts)} texts: {next(iter(result.errors.values()))}")
+        logger.info(f"Generated embeddings for {len(pending) - len(fetched.errors)} texts ({len(texts) - len(pending)} reused)")
+        return result
+
+    def generate_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Generate embeddings for a list of texts using the configured embedding backend.
+
+        Texts that could not be embedded get None instead of a vector.
+        """
+        return self.embed_texts(texts).embeddings
+
+    def generate_query_embedding(self, query: str) -> Optional[List[float]]:
+        """
+        Generate embedding for a query text using the configured embedding backend.
+
+        Returns None if the query could not be embedded.
+        """
+        result = self.embed_texts([query], task_type="retrieval_query")
+        if result.errors:
+            logger.error(f"Error generating query embedding: {result.errors[0]}")
+        return result.embeddings[0]
+
+    def add_context(self, texts: List[str], metadata: Optional[List[dict]] = None) -> Dict[int, str]:
         """
         Add context texts to the vector database.
         
         Args:
             texts: List of text strings to add
             metadata: Optional list of metadata dictionaries for each text
+
+        Returns:
+            Errors for the texts that could not be embedded, by index; those
+            texts are left out of the collection
         """
         if not texts:
-            return
+            return {}
         
         # Generate embeddings
-        embeddings = self.generate_embeddings(texts)
+        result = self.embed_texts(texts)
         
         # Create points
         points = []
-        for i, (text, embedding) in enumerate(zip(texts, embeddings)):
+        created_at = time.time()
+        for i, (text, embedding) in enumerate(zip(texts, result.embeddings)):
+            if embedding is None:
+                continue
             point_metadata = {
                 "text": text,
-                "index": i
+                "index": i,
+                "document_id": self.document_id
             }
             
             # Add custom metadata if provided
             if metadata and i < len(metadata):
                 point_metadata.update(metadata[i])
+
+            # Tenant ids and the TTL clock always come from this session
+            if point_metadata["document_id"] is not None:
+                point_metadata["document_id"] = str(point_metadata["document_id"])
+            point_metadata["session_id"] = self.session_id
+            point_metadata["user_id"] = self.user_id
+            point_metadata["created_at"] = created_at
             
             points.append(
                 models.PointStruct(
-                    id=i,
+                    id=self._point_id(text, point_metadata["document_id"]),
                     vector=embedding,
                     payload=point_metadata
                 )
             )
         
         # Upsert points
-        self.upsert(points)
+        if points:
+            self.upsert(points)
+        return result.errors
 
-    def search_context(self, query: str, limit: int = 5) -> List[dict]:
+    def search_context(self, query: str, limit: int = 5, document_id: Optional[str] = None) -> List[dict]:
         """
         Search for relevant context based on a query.
         
         Args:
             query: Search query string
             limit: Maximum number of results to return
+            document_id: Only search this document's context
             
         Returns:
             List of dictionaries containing matched texts and metadata
         """
         # Generate query embedding
         query_embedding = self.generate_query_embedding(query)
+        if query_embedding is None:
+            return []
         
         # Search for similar points
-        search_results = self.search(query_embedding, limit)
+        search_results = self.search(query_embedding, limit, document_id)
         
         # Format results
         context_results = []
@@ -196,34 +509,34 @@ class QdrantMemory:
         
         return context_results
 
-    def get_relevant_context(self, query: str, max_context_length: int = 2000) -> str:
+    def document_size(self, document_id: str) -> int:
+        """Number of points this session holds for ``document_id``."""
+        return self.client.count(
+            collection_name=self.collection_name,
+            count_filter=self._tenant_filter(document_id)
+        ).count
+
+    def get_relevant_context(self, query: str, max_tokens: int = 500, limit: int = 10,
+                             document_id: Optional[str] = None) -> str:
         """
         Get relevant context as a formatted string for use in prompts.
         
         Args:
             query: Search query string
-            max_context_length: Maximum length of returned context
+            max_tokens: Estimated token budget for the returned context
+            limit: Number of best matches considered
+            document_id: Only use this document's context
             
         Returns:
-            Formatted context string
+            Formatted context string, best match first
         """
-        results = self.search_context(query, limit=10)
-        
-        if not results:
-            return ""
-        
-        context_parts = []
-        current_length = 0
-        
+        results = self.search_context(query, limit=limit, document_id=document_id)
+
+        parts = []
         for result in results:
-            text = result["text"]
-            if current_length + len(text) > max_context_length:
-                break
-            
-            context_parts.append(text)
-            current_length += len(text)
-        
-        if context_parts:
-            return "Relevant context:\n" + "\n".join(context_parts) + "\n\n"
-        
-        return ""
+            page_number = result["metadata"].get("page_number")
+            if page_number is not None:
+                parts.append(f"Page {page_number}: {result['text']}")
+            else:
+                parts.append(result["text"])
+        return pack_context(parts, max_tokens)
@@ -0,0 +1,166 @@
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Vector file formats by extension: struct code and bytes per value
+EMBEDDING_FORMATS = {
+    "float16": ("e", 2),
+    "float32": ("f", 4)
+}
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
+EMBEDDING_CACHE_TRIM_RATIO = 0.9  # Trim down to this share of the limit so puts do not trim every time
+
+
+def embedding_key(text: str, model: str, task_type: str) -> str:
+    return hashlib.sha256(f"{model}\0{task_type}\0{text}".encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector: Sequence[float], dtype: str) -> bytes:
+    code, _ = EMBEDDING_FORMATS[dtype]
+    if dtype == "float32":
+        values = array("f", vector)
+        if values.itemsize == 4 and struct.pack("=f", 1.0) == struct.pack("<f", 1.0):
+            return values.tobytes()
+    return struct.pack(f"<{len(vector)}{code}", *vector)
+
+
+def decode_vector(data: bytes, dtype: str) -> List[float]:
+    code, width = EMBEDDING_FORMATS[dtype]
+    if len(data) % width:
+        raise ValueError(f"Truncated {dtype} vector of {len(data)} bytes")
+    return list(struct.unpack(f"<{len(data) // width}{code}", data))
+
+
+class EmbeddingCache:
+    """
+    Disk cache of embedding vectors keyed by hash(text, model, task_type).
+
+    Each vector is one little-endian float16 (or float32) file, about 1.5KB
+    for a 768-dim embedding instead of ~15KB as a JSON list. Files are
+    sharded by the first two hex digits of the key. The directory is kept
+    under ``max_disk_bytes`` by evicting the least recently used entries;
+    a hit refreshes the file's mtime.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = os.getenv("EMBEDDING_CACHE_DIR", "cache/embeddings"),
+        max_disk_bytes: int = int(os.getenv("EMBEDDING_CACHE_DISK_BYTES", str(256 * 1024 * 1024))),
+        dtype: str = EMBEDDING_CACHE_DTYPE
+    ):
+        if dtype not in EMBEDDING_FORMATS:
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.cache_dir = Path(cache_dir)
+        self.max_disk_bytes = max_disk_bytes
+        self.dtype = dtype
+        self._disk_bytes: Optional[int] = None  # Counted on first write
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str, dtype: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.{dtype}"
+
+    def _read(self, key: str) -> Optional[List[float]]:
+        # Entries written under another dtype setting are still readable
+        for dtype in (self.dtype, *(name for name in EMBEDDING_FORMATS if name != self.dtype)):
+            path = self._path(key, dtype)
+            try:
+                data = path.read_bytes()
+                os.utime(path)  # Mark as recently used for eviction
+                return decode_vector(data, dtype)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable embedding cache entry {path}: {e}")
+        return None
+
+    def get(self, text: str, model: str, task_type: str) -> Optional[List[float]]:
+        """Cached embedding for ``text``, or None."""
+        return self.get_many([text], model, task_type)[0]
+
+    def get_many(self, texts: Sequence[str], model: str, task_type: str) -> List[Optional[List[float]]]:
+        """Cached embeddings for ``texts`` in order, with None for misses."""
+        vectors = [self._read(embedding_key(text, model, task_type)) for text in texts]
+        found = sum(vector is not None for vector in vectors)
+        with self._lock:
+            self.hits += found
+            self.misses += len(vectors) - found
+        return vectors
+
+    def put(self, text: str, model: str, task_type: str, vector: Sequence[float]):
+        self.put_many([text], model, task_type, [vector])
+
+    def put_many(self, texts: Sequence[str], model: str, task_type: str, vectors: Sequence[Sequence[float]]):
+        written = 0
+        for text, vector in zip(texts, vectors):
+            path = self._path(embedding_key(text, model, task_type), self.dtype)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                existing = path.stat().st_size if path.exists() else 0
+                # Write to a temp file first so readers never see a partial vector
+                fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(encode_vector(vector, self.dtype))
+                os.replace(tmp_path, path)
+                written += path.stat().st_size - existing
+            except OSError as e:
+                logger.warning(f"Could not write embedding cache entry {path.name}: {e}")
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += written
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._trim_disk()
+
+    def _entries(self):
+        for path in self.cache_dir.glob("*/*.float*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _trim_disk(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_disk_bytes * EMBEDDING_CACHE_TRIM_RATIO)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+        with self._lock:
+            self._disk_bytes = total
+
+    def stats(self) -> Dict[str, Union[int, float, str]]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_embeddings": self.hits,
+                "disk_bytes": self._disk_bytes if self._disk_bytes is not None else self._scan_disk_bytes(),
+                "dtype": self.dtype
+            }
+
+
+embedding_cache = EmbeddingCache()
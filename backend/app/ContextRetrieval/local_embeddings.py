@@ -0,0 +1,97 @@
+from itertools import chain
+from typing import Dict, List, Sequence
+import hashlib
+import os
+import re
+import threading
+import numpy as np
+
+LOCAL_EMBEDDING_DIMENSION = int(os.getenv("LOCAL_EMBEDDING_DIMENSION", "1024"))
+LOCAL_EMBEDDING_BIGRAM_WEIGHT = 0.5  # Bigrams add word order without drowning out the words themselves
+LOCAL_EMBEDDING_VOCAB_LIMIT = 200_000  # Hashed features remembered before the lookup table is reset
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could did do does for from had has
+have how if in into is it its may more most no not of on or other our out so some such than that the their
+them then there these they this those through to up use used using was we were what when where which while
+who why will with would you your
+""".split())
+
+
+class HashingEmbedder:
+    """
+    Offline text embeddings by feature hashing.
+
+    Lower-cased words (minus stop words) and adjacent word pairs are hashed
+    into ``dimension`` buckets with a sign bit, counts are damped with log1p
+    and each vector is L2-normalised, so cosine similarity behaves like
+    TF-based lexical overlap. No vocabulary, model or network is needed and
+    the same text always gets the same vector, in any process.
+
+    ``encode`` looks features up for the whole batch at once and builds the
+    matrix with one bincount, so per-text cost is mostly tokenizing.
+    """
+
+    def __init__(self, dimension: int = LOCAL_EMBEDDING_DIMENSION, bigrams: bool = True):
+        if dimension < 2:
+            raise ValueError("dimension must be at least 2")
+        self.dimension = dimension
+        self.bigrams = bigrams
+        self._codes: Dict[str, int] = {}  # feature -> +/-(bucket + 1), the sign being the hash sign
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return f"hashing-{self.dimension}{'-bigrams' if self.bigrams else ''}"
+
+    def _code(self, feature: str) -> int:
+        # blake2b rather than hash() so vectors are stable across processes
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        bucket = value % self.dimension + 1
+        return bucket if value >> 63 else -bucket
+
+    def _lookup(self, features: List[str]) -> List[int]:
+        codes = list(map(self._codes.get, features))
+        if None in codes:
+            missing = {feature: self._code(feature) for feature, code in zip(features, codes) if code is None}
+            with self._lock:
+                if len(self._codes) + len(missing) > LOCAL_EMBEDDING_VOCAB_LIMIT:
+                    self._codes.clear()
+                self._codes.update(missing)
+            codes = [missing[feature] if code is None else code for feature, code in zip(features, codes)]
+        return codes
+
+    def _entries(self, feature_lists: List[List[str]], weight: float):
+        """Flat matrix positions and signed weights of every feature in the batch."""
+        count = len(feature_lists)
+        lengths = np.fromiter(map(len, feature_lists), dtype=np.int64, count=count)
+        codes = np.asarray(self._lookup(list(chain.from_iterable(feature_lists))), dtype=np.int64)
+        rows = np.repeat(np.arange(count, dtype=np.int64), lengths)
+        return rows * self.dimension + np.abs(codes) - 1, np.sign(codes) * weight
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` as an (n, dimension) float32 array of unit rows."""
+        word_lists = [
+            [word for word in _TOKEN.findall(text.lower()) if word not in STOP_WORDS]
+            for text in texts
+        ]
+        positions, weights = self._entries(word_lists, 1.0)
+        if self.bigrams:
+            bigram_lists = [[f"{first} {second}" for first, second in zip(words, words[1:])] for words in word_lists]
+            bigram_positions, bigram_weights = self._entries(bigram_lists, LOCAL_EMBEDDING_BIGRAM_WEIGHT)
+            positions = np.concatenate([positions, bigram_positions])
+            weights = np.concatenate([weights, bigram_weights])
+
+        matrix = np.bincount(positions, weights=weights, minlength=len(texts) * self.dimension)
+        matrix = matrix.astype(np.float32).reshape(len(texts), self.dimension)
+
+        # Damp repeated terms, keeping the hash sign
+        signs = np.sign(matrix)
+        np.abs(matrix, out=matrix)
+        np.log1p(matrix, out=matrix)
+        matrix *= signs
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
@@ -0,0 +1,236 @@
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+import json
+import re
+import sqlite3
+import threading
+import numpy as np
+from qdrant_client import models
+from qdrant_client.http.models import QueryResponse  # qdrant_client.models.QueryResponse is the fastembed type
+
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_RANGE_OPERATORS = (("lt", "<"), ("lte", "<="), ("gt", ">"), ("gte", ">="))
+
+
+def _field(key: str) -> str:
+    # Field names are inlined so SQLite can match the expression indexes
+    if not _FIELD_NAME.match(key):
+        raise ValueError(f"Unsupported payload field name: {key!r}")
+    return f"json_extract(payload, '$.{key}')"
+
+
+def _condition_sql(condition) -> Tuple[str, list]:
+    if not isinstance(condition, models.FieldCondition):
+        raise NotImplementedError(f"Unsupported filter condition: {type(condition).__name__}")
+    column = _field(condition.key)
+    if isinstance(condition.match, models.MatchValue):
+        if condition.match.value is None:
+            return f"{column} IS NULL", []
+        return f"{column} = ?", [condition.match.value]
+    if isinstance(condition.match, models.MatchAny):
+        marks = ", ".join("?" for _ in condition.match.any)
+        return f"{column} IN ({marks})", list(condition.match.any)
+    if isinstance(condition.range, models.Range):
+        parts, params = [], []
+        for attribute, operator in _RANGE_OPERATORS:
+            value = getattr(condition.range, attribute)
+            if value is not None:
+                parts.append(f"{column} {operator} ?")
+                params.append(value)
+        if parts:
+            return " AND ".join(parts), params
+    raise NotImplementedError(f"Unsupported filter on {condition.key!r}")
+
+
+def _filter_sql(query_filter: Optional[models.Filter]) -> Tuple[str, list]:
+    if query_filter is None:
+        return "", []
+    clauses, params = [], []
+    for condition in query_filter.must or []:
+        sql, values = _condition_sql(condition)
+        clauses.append(f"({sql})")
+        params.extend(values)
+    for condition in query_filter.must_not or []:
+        sql, values = _condition_sql(condition)
+        clauses.append(f"NOT ({sql})")
+        params.extend(values)
+    if query_filter.should:
+        should = [_condition_sql(condition) for condition in query_filter.should]
+        clauses.append("(" + " OR ".join(f"({sql})" for sql, _ in should) + ")")
+        for _, values in should:
+            params.extend(values)
+    if not clauses:
+        return "", []
+    return " AND " + " AND ".join(clauses), params
+
+
+class LocalVectorStore:
+    """
+    Embedded vector store in a single SQLite file.
+
+    Implements the part of the QdrantClient API that QdrantMemory uses, so
+    it can stand in for a Qdrant server. Payloads are stored as JSON and
+    ``create_payload_index`` adds a real SQLite expression index, so a
+    search filtered to one tenant reads only that tenant's rows and scores
+    them with NumPy. (Qdrant's own embedded mode ignores payload indexes and
+    evaluates filters point by point in Python.) The file is in WAL mode,
+    so several worker processes can share it.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes = {}  # collection -> (vector size, normalize)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS collections (
+                    name TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    distance TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS points (
+                    collection TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (collection, id)
+                );
+            """)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _collection(self, collection_name: str) -> Tuple[int, bool]:
+        if collection_name not in self._sizes:
+            row = self._conn.execute(
+                "SELECT size, distance FROM collections WHERE name = ?", (collection_name,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Collection {collection_name} not found")
+            self._sizes[collection_name] = (row[0], row[1] == models.Distance.COSINE.value)
+        return self._sizes[collection_name]
+
+    def collection_exists(self, collection_name: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM collections WHERE name = ?", (collection_name,)
+            ).fetchone() is not None
+
+    def create_collection(self, collection_name: str, vectors_config: models.VectorParams, **kwargs) -> bool:
+        if vectors_config.distance not in (models.Distance.COSINE, models.Distance.DOT):
+            raise NotImplementedError(f"Unsupported distance: {vectors_config.distance}")
+        with self._lock:
+            # Another worker may have created it first; keep its points
+            created = self._conn.execute(
+                "INSERT OR IGNORE INTO collections (name, size, distance) VALUES (?, ?, ?)",
+                (collection_name, vectors_config.size, vectors_config.distance.value)
+            ).rowcount
+            self._conn.commit()
+        return bool(created)
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        with self._lock:
+            self._conn.execute("DELETE FROM points WHERE collection = ?", (collection_name,))
+            self._conn.execute("DELETE FROM collections WHERE name = ?", (collection_name,))
+            self._conn.commit()
+            self._sizes.pop(collection_name, None)
+        return True
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema=None, **kwargs):
+        index_name = f"points_{field_name}"
+        with self._lock:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON points (collection, {_field(field_name)})"
+            )
+            self._conn.commit()
+        return models.UpdateResult(operation_id=0, status=models.UpdateStatus.COMPLETED)
+
+    def upsert(self, collection_name: str, points: Sequence[models.PointStruct], **kwargs):
+        with self._lock:
+            size, normalize = self._collection(collection_name)
+            rows = []
+            for point in points:
+                vector = np.asarray(point.vector, dtype=np.float32)
+                if vector.shape != (size,):
+                    raise ValueError(f"Expected a vector of size {size}, got {vector.shape}")
+                if normalize:
+                    norm = np.linalg.norm(vector)
+                    if norm:
+                        vector = vector / norm
+                rows.append((collection_name, json.dumps(point.id), vector.tobytes(), json.dumps(point.payload or {})))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO points (collection, id, vector, payload) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+        return models.UpdateResult(operation_id=0, status=models.UpdateStatus.COMPLETED)
+
+    def query_points(self, collection_name: str, query: Sequence[float], query_filter: Optional[models.Filter] = None,
+                     limit: int = 10, with_payload: bool = True, **kwargs) -> QueryResponse:
+        where, params = _filter_sql(query_filter)
+        with self._lock:
+            size, normalize = self._collection(collection_name)
+            rows = self._conn.execute(
+                f"SELECT rowid, vector FROM points WHERE collection = ?{where}", [collection_name, *params]
+            ).fetchall()
+        if not rows:
+            return QueryResponse(points=[])
+
+        query_vector = np.asarray(query, dtype=np.float32)
+        if normalize:
+            norm = np.linalg.norm(query_vector)
+            if norm:
+                query_vector = query_vector / norm
+        matrix = np.frombuffer(b"".join(vector for _, vector in rows), dtype=np.float32).reshape(len(rows), size)
+        scores = matrix @ query_vector
+        if len(rows) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-scores[top])]
+
+        rowids = [rows[i][0] for i in top]
+        with self._lock:
+            found = dict(
+                (rowid, (point_id, payload)) for rowid, point_id, payload in self._conn.execute(
+                    f"SELECT rowid, id, payload FROM points WHERE rowid IN ({', '.join('?' for _ in rowids)})", rowids
+                )
+            )
+        points: List[models.ScoredPoint] = []
+        for i, rowid in zip(top, rowids):
+            if rowid not in found:
+                continue  # Deleted between the two reads
+            point_id, payload = found[rowid]
+            points.append(models.ScoredPoint(
+                id=json.loads(point_id), version=0, score=float(scores[i]),
+                payload=json.loads(payload) if with_payload else None
+            ))
+        return QueryResponse(points=points)
+
+    def delete(self, collection_name: str, points_selector, **kwargs):
+        if isinstance(points_selector, models.FilterSelector):
+            where, params = _filter_sql(points_selector.filter)
+            sql, args = f"DELETE FROM points WHERE collection = ?{where}", [collection_name, *params]
+        elif isinstance(points_selector, models.PointIdsList):
+            marks = ", ".join("?" for _ in points_selector.points)
+            sql = f"DELETE FROM points WHERE collection = ? AND id IN ({marks})"
+            args = [collection_name, *(json.dumps(point_id) for point_id in points_selector.points)]
+        else:
+            raise NotImplementedError(f"Unsupported points selector: {type(points_selector).__name__}")
+        with self._lock:
+            self._conn.execute(sql, args)
+            self._conn.commit()
+        return models.UpdateResult(operation_id=0, status=models.UpdateStatus.COMPLETED)
+
+    def count(self, collection_name: str, count_filter: Optional[models.Filter] = None, **kwargs) -> models.CountResult:
+        where, params = _filter_sql(count_filter)
+        with self._lock:
+            count = self._conn.execute(
+                f"SELECT COUNT(*) FROM points WHERE collection = ?{where}", [collection_name, *params]
+            ).fetchone()[0]
+        return models.CountResult(count=count)
@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+import math
+import os
+import re
+
+CHARS_PER_TOKEN = 4  # Rough average for English text with Gemini/GPT tokenizers
+SECTION_OVERLAP_TOKENS = int(os.getenv("SECTION_OVERLAP_TOKENS", "0"))
+CHUNKER_VERSION = 2
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t\r\f\v]*\n\s*")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+PARAGRAPH_SEP = "\n\n"
+SENTENCE_SEP = " "
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local estimate of how many LLM tokens ``text`` uses.
+
+    Takes the larger of the character-based estimate and the word count
+    (short words are still at least a token each), which tracks real
+    tokenizers closely enough for sizing chunks without calling one.
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / CHARS_PER_TOKEN), len(text.split()))
+
+
+@dataclass
+class Chunk:
+    """One chunk of text and its estimated token count."""
+    text: str
+    tokens: int
+
+
+class TextChunker:
+    """
+    Split text into chunks of at most ``max_tokens`` estimated tokens.
+
+    Text is cut at paragraph breaks where possible, then at sentence ends,
+    then at whitespace, and only as a last resort inside a word. Every piece
+    of text is measured once and chunk sizes are summed from those
+    measurements, so chunking is linear in the input size.
+    """
+
+    def __init__(self, max_tokens: int = 250, overlap_tokens: int = 0, min_tokens: int = None):
+        """
+        Args:
+            max_tokens (int): Token budget per chunk
+            overlap_tokens (int): Tokens from the end of a chunk repeated at
+                the start of the next one
+            min_tokens (int): A final chunk smaller than this is merged into
+                the previous one; defaults to an eighth of max_tokens
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        if overlap_tokens < 0 or overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be between 0 and max_tokens - 1")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_tokens = max_tokens // 8 if min_tokens is None else min_tokens
+
+    def signature(self) -> str:
+        # Bump the version whenever boundaries change, so cached parses are redone
+        return f"v{CHUNKER_VERSION}:{self.max_tokens}:{self.overlap_tokens}:{self.min_tokens}"
+
+    def split(self, text: str) -> List[str]:
+        """Return the chunk texts for ``text``."""
+        return [chunk.text for chunk in self.chunks(text)]
+
+    def chunks(self, text: str) -> List[Chunk]:
+        """Return the chunks for ``text`` with their token estimates."""
+        chunks = []
+        sizes = []  # (chars, words) of each chunk, so folding needs no re-measuring
+        current = []  # (separator, text, chars, words) units of the chunk being built
+        chars = words = 0
+        carried = 0  # Leading units of ``current`` repeated from the previous chunk
+        # Within budget <=> chars fit max_chars and words fit max_tokens
+        max_chars = self.max_tokens * CHARS_PER_TOKEN
+
+        for unit in self._units(text):
+            separator, _, unit_chars, unit_words = unit
+            joined_chars = chars + (len(separator) if current else 0) + unit_chars
+            if current and (joined_chars > max_chars or words + unit_words > self.max_tokens):
+                chunks.append(self._chunk(current, chars, words))
+                sizes.append((chars, words))
+                current = self._overlap(current, unit)
+                carried = len(current)
+                chars, words = self._size(current)
+                joined_chars = chars + (len(separator) if current else 0) + unit_chars
+            current.append(unit)
+            chars, words = joined_chars, words + unit_words
+
+        if len(current) > carried:
+            tail = current[carried:]
+            tail_chars, tail_words = self._size(tail)
+            if chunks and self._tokens(tail_chars, tail_words) < self.min_tokens:
+                # Fold a tiny tail into the previous chunk if that still fits the budget
+                last_chars, last_words = sizes[-1]
+                folded_chars = last_chars + len(tail[0][0]) + tail_chars
+                folded_tokens = self._tokens(folded_chars, last_words + tail_words)
+                if folded_tokens <= self.max_tokens:
+                    chunks[-1] = Chunk(chunks[-1].text + tail[0][0] + self._render(tail), folded_tokens)
+                    return chunks
+            chunks.append(self._chunk(current, chars, words))
+
+        return chunks
+
+    def _units(self, text: str) -> Iterator[Tuple[str, str, int, int]]:
+        """
+        Yield ``(separator, text, chars, words)`` pieces that each fit the budget.
+
+        Pieces have no surrounding whitespace and separators are whitespace,
+        so the size of joined pieces is just the sum of their sizes.
+        """
+        for paragraph in _PARAGRAPH_BREAK.split(text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            words = self._fitting_words(paragraph)
+            if words is not None:
+                yield PARAGRAPH_SEP, paragraph, len(paragraph), words
+                continue
+
+            separator = PARAGRAPH_SEP
+            for sentence in _SENTENCE_END.split(paragraph):
+                if not sentence:
+                    continue
+                words = self._fitting_words(sentence)
+                if words is not None:
+                    yield separator, sentence, len(sentence), words
+                else:
+                    for piece, piece_chars, piece_words in self._split_long(sentence):
+                        yield separator, piece, piece_chars, piece_words
+                        separator = SENTENCE_SEP
+                separator = SENTENCE_SEP
+
+    def _fitting_words(self, text: str):
+        """Word count of ``text`` if it fits the budget, else None."""
+        # Over budget on characters alone: skip counting the words
+        if len(text) > self.max_tokens * CHARS_PER_TOKEN:
+            return None
+        words = len(text.split())
+        return words if words <= self.max_tokens else None
+
+    def _split_long(self, sentence: str) -> Iterator[Tuple[str, int, int]]:
+        """Split a sentence longer than the budget at whitespace, then by characters."""
+        words = []
+        words_chars = 0  # Length of " ".join(words), spaces included
+
+        for word in sentence.split():
+            if math.ceil(len(word) / CHARS_PER_TOKEN) > self.max_tokens:
+                if words:
+                    yield " ".join(words), words_chars, len(words)
+                    words, words_chars = [], 0
+                step = self.max_tokens * CHARS_PER_TOKEN
+                for start in range(0, len(word), step):
+                    piece = word[start:start + step]
+                    yield piece, len(piece), 1
+                continue
+            chars = words_chars + len(word) + (1 if words else 0)
+            if words and self._tokens(chars, len(words) + 1) > self.max_tokens:
+                yield " ".join(words), words_chars, len(words)
+                words, words_chars = [], 0
+                chars = len(word)
+            words.append(word)
+            words_chars = chars
+        if words:
+            yield " ".join(words), words_chars, len(words)
+
+    def _overlap(self, units, next_unit) -> list:
+        """Trailing units of a finished chunk to repeat at the start of the next."""
+        if not self.overlap_tokens:
+            return []
+        tail = []
+        chars = words = 0
+        for unit in reversed(units):
+            # Joined to the tail by the separator of the unit after it
+            joined_chars = unit[2] + (len(tail[-1][0]) + chars if tail else 0)
+            if self._tokens(joined_chars, words + unit[3]) > self.overlap_tokens:
+                break
+            tail.append(unit)
+            chars, words = joined_chars, words + unit[3]
+        tail.reverse()
+        if tail and self._tokens(chars + len(next_unit[0]) + next_unit[2], words + next_unit[3]) > self.max_tokens:
+            return []
+        return tail
+
+    @staticmethod
+    def _tokens(chars: int, words: int) -> int:
+        # estimate_tokens() from the sizes of the text instead of the text itself
+        return max(math.ceil(chars / CHARS_PER_TOKEN), words)
+
+    @staticmethod
+    def _size(units) -> Tuple[int, int]:
+        """(chars, words) of the rendered units."""
+        chars = sum(unit[2] for unit in units) + sum(len(unit[0]) for unit in units[1:])
+        return chars, sum(unit[3] for unit in units)
+
+    def _chunk(self, units, chars: int, words: int) -> Chunk:
+        return Chunk(self._render(units), self._tokens(chars, words))
+
+    @staticmethod
+    def _render(units) -> str:
+        parts = [units[0][1]]
+        for separator, text, *_ in units[1:]:
+            parts.append(separator)
+            parts.append(text)
+        return "".join(parts)
@@ -1,16 +1,167 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, AsyncIterator, Iterable, Iterator, Optional, Union
 from dataclasses import dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import gc
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from xml.etree import ElementTree
 import PyPDF2
-import docx
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # Optional: PDFs fall back to PyPDF2
+    fitz = None
 from pathlib import Path
 import logging
 from abc import ABC, abstractmethod
-# from .ocr import SimpleOCR
+from .chunker import CHARS_PER_TOKEN, SECTION_OVERLAP_TOKENS, TextChunker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# PDFs with at least this many pages are extracted in the shared process pool
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "40"))
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+
+# Readers are reopened after this many pages so their object caches cannot
+# grow with the document (PyPDF2 keeps every resolved object until closed)
+PDF_PAGES_PER_READER = int(os.getenv("PDF_PAGES_PER_READER", "64"))
+# Stop parsing when the process RSS stays above this after freeing caches (0 = no limit)
+PDF_MEMORY_CEILING_MB = int(os.getenv("PDF_MEMORY_CEILING_MB", "0"))
+PDF_MEMORY_CHECK_PAGES = 16  # Pages between RSS checks
+
+class DocumentTooLarge(Exception):
+    """Parsing a document would take the process over its memory ceiling."""
+    pass
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+# Pages with less text than this that contain images are sent to OCR
+PDF_OCR_ENABLED = os.getenv("PDF_OCR_ENABLED", "1") == "1"
+PDF_OCR_MIN_PAGE_CHARS = int(os.getenv("PDF_OCR_MIN_PAGE_CHARS", "20"))
+
+# A document is either a path on disk or its bytes (e.g. an upload kept in memory)
+DocumentSource = Union[str, Path, bytes, bytearray, memoryview]
+
+def is_path_source(source: DocumentSource) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+def open_source(source: DocumentSource):
+    """Binary file object for a path or an in-memory document."""
+    if is_path_source(source):
+        return open(source, 'rb')
+    return io.BytesIO(source)
+
+def describe_source(source: DocumentSource) -> str:
+    """Path or size of a source, for log messages."""
+    if is_path_source(source):
+        return str(source)
+    return f"<{len(source)} byte upload>"
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+# Runs pool tasks in-process when the pool they were sent to breaks
+_parse_fallback_threads = ThreadPoolExecutor(max_workers=PDF_PARSE_WORKERS, thread_name_prefix="parse-fallback")
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Process pool shared by every parser in this process (quiz and doubt endpoints).
+
+    Workers are spawned rather than forked so they never inherit the API's
+    threads or open LLM connections.
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=PDF_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
+
+def discard_parse_pool(pool: ProcessPoolExecutor):
+    """
+    Drop a broken pool so the next get_parse_pool() starts a fresh one.
+
+    A worker killed mid-task (e.g. by the OOM killer) breaks the whole
+    executor for good, so it has to be replaced rather than reused.
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def submit_to_parse_pool(fn, *args) -> Future:
+    """
+    Run ``fn(*args)`` in the shared process pool and return its future.
+
+    If the pool is or becomes broken it is discarded, and this task runs in
+    a thread of this process instead, so the caller still gets its result.
+    Cancelling the returned future cancels the pool task.
+    """
+    result = Future()
+
+    def run_here():
+        if not result.set_running_or_notify_cancel():
+            return
+        try:
+            result.set_result(fn(*args))
+        except BaseException as e:
+            result.set_exception(e)
+
+    def fall_back(pool):
+        logger.warning(f"Parse pool broke, running {fn.__name__} in-process and starting a new pool")
+        discard_parse_pool(pool)
+        _parse_fallback_threads.submit(run_here)
+
+    def relay(future, pool):
+        if future.cancelled():
+            if not result.cancelled():
+                fall_back(pool)  # Cancelled by another caller discarding the pool
+            return
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            fall_back(pool)
+        elif result.set_running_or_notify_cancel():
+            if error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(future.result())
+
+    pool = get_parse_pool()
+    try:
+        future = pool.submit(fn, *args)
+    except BrokenProcessPool:
+        fall_back(pool)
+        return result
+    result.add_done_callback(lambda done: done.cancelled() and future.cancel())
+    future.add_done_callback(lambda done: relay(done, pool))
+    return result
+
+def shutdown_parse_pool():
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(cancel_futures=True)
+            _parse_pool = None
+
 @dataclass
 class DocumentSection:
     """Represents a section of text from a document."""
@@ -36,199 +187,579 @@ class DocumentParser(ABC):
         if max_section_length < 100:
             raise ValueError("max_section_length must be at least 100 characters")
         self.max_section_length = max_section_length
+        # Sections are cut to a token budget equivalent to max_section_length
+        self.chunker = TextChunker(
+            max_tokens=max_section_length // CHARS_PER_TOKEN,
+            overlap_tokens=SECTION_OVERLAP_TOKENS
+        )
 
     @abstractmethod
-    def parse(self, file_path: str) -> List[DocumentSection]:
-        """Parse the document and return sections."""
+    def parse(self, file_path: DocumentSource) -> List[DocumentSection]:
+        """Parse the document (a path or its bytes) and return sections."""
         pass
 
+    def cache_signature(self) -> str:
+        """Everything besides the file bytes that changes this parser's output."""
+        return f"{type(self).__name__}:{self.max_section_length}:{self.chunker.signature()}"
+
+    def iter_sections(self, file_path: DocumentSource) -> Iterator[DocumentSection]:
+        """
+        Yield sections as they are parsed.
+
+        Parsers that can read incrementally override this; the default just
+        yields the result of parse().
+        """
+        yield from self.parse(file_path)
+
+    async def aiter_sections(self, file_path: DocumentSource, max_buffered: int = 8) -> AsyncIterator[DocumentSection]:
+        """
+        Async version of iter_sections for use inside the event loop.
+
+        Parsing runs in a worker thread and hands sections over through a
+        queue of at most ``max_buffered`` items, so a slow consumer pauses the
+        parser instead of letting parsed sections pile up in memory. Closing
+        the iterator early (e.g. at a deadline) does not wait for the thread:
+        it stops at its next section, once any OCR call it is in returns.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=max_buffered)
+        stop = threading.Event()
+        finished = object()
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def produce():
+            try:
+                for section in self.iter_sections(file_path):
+                    if stop.is_set():
+                        return
+                    put(section)
+            except Exception as e:
+                if not stop.is_set():
+                    put(e)
+                return
+            if not stop.is_set():
+                put(finished)
+
+        loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            # Free a producer blocked on a full queue so it can see the stop flag;
+            # with the queue empty, the one put it may still make cannot block
+            while not queue.empty():
+                queue.get_nowait()
+
     def _split_into_sections(self, text: str) -> List[str]:
         """
-        Split text into manageable sections based on max_section_length.
-        
+        Split text into sections that fit the section token budget.
+
         Args:
             text (str): Text to split into sections
-            
+
         Returns:
             List[str]: List of text sections
         """
         if not text.strip():
             return []
+        return self.chunker.split(text)
 
-        sections = []
-        current_section = []
-        current_length = 0
-        
-        # Split text into paragraphs
-        paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-        
-        for para in paragraphs:
-            if len(para) > self.max_section_length:
-                # Split long paragraphs into sentences
-                sentences = [s.strip() for s in para.split('. ') if s.strip()]
-                for sentence in sentences:
-                    if current_length + len(sentence) > self.max_section_length and current_section:
-                        sections.append(' '.join(current_section))
-                        current_section = []
-                        current_length = 0
-                    
-                    current_section.append(sentence)
-                    current_length += len(sentence)
-            else:
-                if current_length + len(para) > self.max_section_length and current_section:
-                    sections.append(' '.join(current_section))
-                    current_section = []
-                    current_length = 0
-                
-                current_section.append(para)
-                current_length += len(para)
-        
-        if current_section:
-            sections.append(' '.join(current_section))
-            
-        return sections
+@dataclass
+class PageContent:
+    """Text and image information extracted from one PDF page."""
+    page_number: int
+    text: str
+    has_image: bool = False
+
+class PDFTextEngine(ABC):
+    """Backend that pulls text and image flags out of PDF pages."""
+
+    name = ""
+
+    @abstractmethod
+    def page_count(self, file_path: DocumentSource) -> int:
+        """Number of pages in the PDF."""
+        pass
+
+    @abstractmethod
+    def iter_pages(self, file_path: DocumentSource, start: int, end: int) -> Iterator[PageContent]:
+        """Extract pages ``start`` (inclusive) to ``end`` (exclusive), 0-based, one at a time."""
+        pass
+
+class PyPDF2Engine(PDFTextEngine):
+    """Pure-Python extraction with PyPDF2; always available."""
+
+    name = "pypdf2"
+
+    def page_count(self, file_path: DocumentSource) -> int:
+        with open_source(file_path) as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+    def iter_pages(self, file_path: DocumentSource, start: int, end: int) -> Iterator[PageContent]:
+        with open_source(file_path) as file:
+            reader = PyPDF2.PdfReader(file)
+            for page_index in range(start, min(end, len(reader.pages))):
+                page = reader.pages[page_index]
+                resources = page.get('/Resources')
+                if resources is not None:
+                    resources = resources.get_object()
+                yield PageContent(
+                    page_number=page_index + 1,
+                    text=page.extract_text() or "",
+                    has_image=resources is not None and '/XObject' in resources
+                )
+
+class PyMuPDFEngine(PDFTextEngine):
+    """Extraction with PyMuPDF (fitz), much faster on large or complex PDFs."""
+
+    name = "pymupdf"
+
+    @staticmethod
+    def _open(file_path: DocumentSource):
+        if is_path_source(file_path):
+            return fitz.open(file_path)
+        return fitz.open(stream=file_path, filetype="pdf")
+
+    def page_count(self, file_path: DocumentSource) -> int:
+        with self._open(file_path) as doc:
+            return doc.page_count
+
+    def iter_pages(self, file_path: DocumentSource, start: int, end: int) -> Iterator[PageContent]:
+        with self._open(file_path) as doc:
+            for page_index in range(start, min(end, doc.page_count)):
+                page = doc.load_page(page_index)
+                yield PageContent(
+                    page_number=page_index + 1,
+                    text=page.get_text("text") or "",
+                    has_image=bool(page.get_images(full=False))
+                )
+
+PDF_ENGINES = {
+    PyPDF2Engine.name: PyPDF2Engine,
+    PyMuPDFEngine.name: PyMuPDFEngine
+}
+PDF_ENGINE = os.getenv("PDF_ENGINE", "auto")  # auto, pymupdf or pypdf2
+
+def get_pdf_engine(name: Optional[str] = None) -> PDFTextEngine:
+    """
+    Resolve an engine name; "auto" prefers PyMuPDF when it is installed.
+    """
+    name = (name or PDF_ENGINE).lower()
+    if name == "auto":
+        name = PyMuPDFEngine.name if fitz is not None else PyPDF2Engine.name
+    if name == PyMuPDFEngine.name and fitz is None:
+        logger.warning("PyMuPDF is not installed, falling back to PyPDF2")
+        name = PyPDF2Engine.name
+
+    engine_class = PDF_ENGINES.get(name)
+    if not engine_class:
+        raise ValueError(f"Unsupported PDF engine: {name}")
+    return engine_class()
+
+def _iter_page_range(engine_name: str, file_path: DocumentSource, start: int, end: int) -> Iterator[PageContent]:
+    """
+    Extract a page range with the named engine, finishing with PyPDF2 if it fails.
+
+    The document is reopened every PDF_PAGES_PER_READER pages, so memory
+    does not grow with the length of the range.
+    """
+    engine = get_pdf_engine(engine_name)
+    next_index = start
+    try:
+        for window_start in range(start, end, PDF_PAGES_PER_READER):
+            window_end = min(end, window_start + PDF_PAGES_PER_READER)
+            for page in engine.iter_pages(file_path, window_start, window_end):
+                next_index = page.page_number
+                yield page
+    except Exception as e:
+        if engine.name == PyPDF2Engine.name:
+            raise
+        logger.warning(f"{engine.name} failed on {describe_source(file_path)} page {next_index + 1}, using PyPDF2: {e}")
+        yield from _iter_page_range(PyPDF2Engine.name, file_path, next_index, end)
+
+def _extract_page_range(engine_name: str, file_path: str, start: int, end: int) -> List[PageContent]:
+    """
+    List version of _iter_page_range; module-level so it can run in the process pool.
+    """
+    return list(_iter_page_range(engine_name, file_path, start, end))
 
 class PDFParser(DocumentParser):
     """Parser for PDF documents."""
-    
-    def is_likely_scanned_pdf(file_path: str, min_text_chars: int = 100) -> bool:
+
+    def __init__(
+        self,
+        max_section_length: int = 1000,
+        parallel: Optional[bool] = None,
+        engine: Optional[str] = None,
+        use_ocr: bool = PDF_OCR_ENABLED,
+        ocr=None,
+        memory_ceiling_mb: int = PDF_MEMORY_CEILING_MB
+    ):
+        """
+        Initialize the PDF parser.
+
+        Args:
+            max_section_length (int): Maximum number of characters per section
+            parallel (Optional[bool]): Extract pages in the process pool. None
+                decides per document using PDF_PARALLEL_PAGE_THRESHOLD.
+            engine (Optional[str]): Text extraction engine ("auto", "pymupdf"
+                or "pypdf2"); defaults to PDF_ENGINE
+            use_ocr (bool): OCR pages that only contain images
+            ocr (OCR): OCR instance to use; created on first scanned page
+            memory_ceiling_mb (int): Raise DocumentTooLarge if the process
+                RSS stays above this while parsing; 0 disables the check
+        """
+        super().__init__(max_section_length=max_section_length)
+        self.parallel = parallel
+        self.engine = get_pdf_engine(engine)
+        self.use_ocr = use_ocr
+        self.ocr = ocr
+        self.ocr_failures = 0  # Scanned pages of the last parse whose OCR failed
+        self.memory_ceiling_mb = memory_ceiling_mb
+
+    def cache_signature(self) -> str:
+        return f"{super().cache_signature()}:{self.engine.name}:{'ocr' if self.use_ocr else 'text'}"
+
+    def needs_ocr(self, page: PageContent) -> bool:
+        """A page is OCR'd when it has images but (almost) no text layer."""
+        return self.use_ocr and page.has_image and len(page.text.strip()) < PDF_OCR_MIN_PAGE_CHARS
+
+    def _submit_ocr(self, file_path: DocumentSource, page: PageContent):
+        if self.ocr is None:
+            from .ocr import OCR  # Imported lazily: ocr.py imports this module
+            self.ocr = OCR()
+        return self.ocr.submit_page(file_path, page.page_number - 1)
+
+    def _page_count(self, file_path: DocumentSource) -> int:
+        try:
+            return self.engine.page_count(file_path)
+        except Exception as e:
+            if self.engine.name == PyPDF2Engine.name:
+                raise
+            logger.warning(f"{self.engine.name} could not open {describe_source(file_path)}, using PyPDF2: {e}")
+            self.engine = PyPDF2Engine()
+            return self.engine.page_count(file_path)
+
+    def _use_parallel(self, file_path: DocumentSource, page_count: int) -> bool:
+        if self.parallel is not None:
+            return self.parallel
+        return PDF_PARSE_WORKERS > 1 and page_count >= PDF_PARALLEL_PAGE_THRESHOLD
+
+    def iter_pages(self, file_path: DocumentSource) -> Iterator[PageContent]:
+        """
+        Yield extracted pages in page order, one at a time.
+
+        Large documents are split into PDF_PAGES_PER_TASK page ranges that
+        are extracted concurrently in the shared process pool (in-memory
+        uploads are written to a temp file for the workers first); only a
+        couple of ranges per worker are in flight, and pages are still yielded
+        in order. Only the page being yielded is held, so memory does not
+        depend on the page count.
+        """
+        page_count = self._page_count(file_path)
+
+        if not self._use_parallel(file_path, page_count):
+            pages = _iter_page_range(self.engine.name, file_path, 0, page_count)
+        else:
+            pages = self._iter_pool_pages(file_path, page_count)
+
+        if not self.memory_ceiling_mb:
+            yield from pages
+            return
+        for page in pages:
+            if page.page_number % PDF_MEMORY_CHECK_PAGES == 0:
+                self._check_memory(file_path, page.page_number)
+            yield page
+
+    def _iter_pool_pages(self, file_path: DocumentSource, page_count: int) -> Iterator[PageContent]:
+        ranges = iter(range(0, page_count, PDF_PAGES_PER_TASK))
+        in_flight = deque()
+        spool_path = None
+        if not is_path_source(file_path):
+            # Written once, rather than pickling the bytes into every task
+            fd, spool_path = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(fd, 'wb') as file:
+                file.write(file_path)
+            file_path = spool_path
+
+        def submit_next():
+            start = next(ranges, None)
+            if start is not None:
+                in_flight.append(submit_to_parse_pool(
+                    _extract_page_range, self.engine.name, file_path, start, start + PDF_PAGES_PER_TASK
+                ))
+
+        try:
+            for _ in range(PDF_PARSE_WORKERS * 2):
+                submit_next()
+            while in_flight:
+                pages = in_flight.popleft().result()
+                submit_next()
+                yield from pages
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if spool_path is not None:
+                try:
+                    os.remove(spool_path)
+                except OSError as e:
+                    logger.warning(f"Could not remove spooled PDF {spool_path}: {e}")
+
+    def _check_memory(self, file_path: DocumentSource, page_number: int):
+        rss = current_rss_mb()
+        if rss is None or rss <= self.memory_ceiling_mb:
+            return
+        # Free what we can before giving up: collected garbage and PyMuPDF's object store
+        gc.collect()
+        if fitz is not None:
+            fitz.TOOLS.store_shrink(100)
+        rss = current_rss_mb()
+        if rss > self.memory_ceiling_mb:
+            raise DocumentTooLarge(
+                f"Parsing {describe_source(file_path)} exceeded the {self.memory_ceiling_mb}MB memory "
+                f"ceiling at page {page_number}"
+            )
+
+    def extract_pages(self, file_path: DocumentSource) -> List[PageContent]:
+        """
+        Extract every page's text and image flag in a single pass.
+
+        Args:
+            file_path (DocumentSource): Path to the PDF file or its bytes
+
+        Returns:
+            List[PageContent]: One entry per page, in page order
+        """
+        return list(self.iter_pages(file_path))
+
+    @staticmethod
+    def is_likely_scanned(pages: Iterable[PageContent], min_text_chars: int = 100) -> bool:
+        """
+        Heuristically checks if pages come from a scanned PDF.
+        Considers both presence of text and XObject images.
+
+        Stops reading ``pages`` (which may be a lazy iterator) as soon as
+        enough text has been seen.
+        """
+        text_chars = 0
+        has_image = False
+        for page in pages:
+            text_chars += len(page.text.strip())
+            if text_chars >= min_text_chars:
+                return False  # Enough text → not scanned
+            has_image = has_image or page.has_image
+        return has_image  # Else → scanned only if images present
+
+    def is_likely_scanned_pdf(self, file_path: DocumentSource, min_text_chars: int = 100) -> bool:
         """
         Heuristically checks if a PDF is likely scanned.
         Considers both presence of text and XObject images.
         """
+        pages = self.iter_pages(file_path)
         try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                total_text = ""
-                has_image = False
-
-                for page in reader.pages:
-                    text = page.extract_text()
-                    if text:
-                        total_text += text.strip()
-                    if '/XObject' in page.get('/Resources', {}):
-                        has_image = True
-
-                if len(total_text) >= min_text_chars:
-                    return False  # Enough text → not scanned
-            return has_image  # Else → scanned only if images present
-
+            return self.is_likely_scanned(pages, min_text_chars)
         except Exception as e:
             logger.error(f"Error analyzing PDF: {e}")
             return True  # assume scanned if uncertain
+        finally:
+            pages.close()
+
+    def iter_sections(self, file_path: DocumentSource) -> Iterator[DocumentSection]:
+        """
+        Yield sections page by page while the PDF is still being read.
+
+        Each page is classified on its own: pages with a text layer are used
+        as is, pages that only carry images (scans, photographed notes) are
+        OCR'd in the background, and blank pages are skipped. Sections are
+        still yielded in page order; text pages after a scanned page wait
+        only for that page's OCR.
+        """
+        self.ocr_failures = 0
+        ordered = deque()  # (page, OCR future or None) in page order
+
+        try:
+            for page in self.iter_pages(file_path):
+                if self.needs_ocr(page):
+                    ordered.append((page, self._submit_ocr(file_path, page)))
+                elif page.text.strip():
+                    ordered.append((page, None))
+
+                while ordered and (ordered[0][1] is None or ordered[0][1].done()):
+                    yield from self._ready_sections(*ordered.popleft())
+
+            while ordered:
+                yield from self._ready_sections(*ordered.popleft())
+        finally:
+            for _, ocr_future in ordered:
+                if ocr_future is not None:
+                    ocr_future.cancel()
 
+    def _ready_sections(self, page: PageContent, ocr_future) -> Iterator[DocumentSection]:
+        if ocr_future is not None:
+            try:
+                page = PageContent(page.page_number, ocr_future.result(), page.has_image)
+            except Exception as e:
+                self.ocr_failures += 1
+                logger.warning(f"OCR failed for page {page.page_number}: {e}")
+        yield from self._page_sections(page)
 
-    def parse(self, file_path: str) -> List[DocumentSection]:
+    def _page_sections(self, page: PageContent) -> Iterator[DocumentSection]:
+        for section_num, section_text in enumerate(self._split_into_sections(page.text), 1):
+            yield DocumentSection(
+                content=section_text,
+                page_number=page.page_number,
+                section_number=section_num
+            )
+
+    def parse(self, file_path: DocumentSource) -> List[DocumentSection]:
         """
         Parse PDF document and return sections.
+
+        Text is extracted once; only pages without a text layer are OCR'd.
         
         Args:
-            file_path (str): Path to the PDF file
+            file_path (DocumentSource): Path to the PDF file or its bytes
             
         Returns:
             List[DocumentSection]: List of document sections
         """
-
-        if self.is_likely_scanned_pdf(file_path):
-            print(f"Detected likely scanned PDF: {file_path}")
-            # logger.info(f"Detected likely scanned PDF: {file_path}")
-            # with open(file_path, 'rb') as file:
-            #     chunks = SimpleOCR(file.read())
-            # return chunks
-        sections = []
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    if not text.strip():
-                        return []
-                        
-                    page_sections = self._split_into_sections(text)
-                    
-                    for section_num, section_text in enumerate(page_sections, 1):
-                        sections.append(DocumentSection(
-                            content=section_text,
-                            page_number=page_num + 1,
-                            section_number=section_num
-                        ))
-                        
+            return list(self.iter_sections(file_path))
         except Exception as e:
-            logger.error(f"Error reading PDF file {file_path}: {str(e)}")
+            logger.error(f"Error reading PDF file {describe_source(file_path)}: {str(e)}")
             raise
-            
-        return sections
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCX_BUFFER_SECTIONS = 8  # Sections worth of text buffered before it is chunked
+
+def iter_docx_blocks(file_path: DocumentSource) -> Iterator[str]:
+    """
+    Yield the text of a DOCX file's paragraphs and table rows in document order.
+
+    ``word/document.xml`` is streamed out of the zip and parsed incrementally;
+    finished elements are cleared so memory stays flat however long the
+    document is. Each table row becomes one block with its cells separated by
+    " | ".
+    """
+    with zipfile.ZipFile(open_source(file_path)) as archive:
+        with archive.open("word/document.xml") as xml_file:
+            body = None
+            runs = []  # Text of the paragraph being read
+            rows = []  # Cell texts of each open table row (nested tables stack)
+            cells = []  # Paragraph texts of each open table cell
+
+            for event, element in ElementTree.iterparse(xml_file, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    if tag == _W + "body":
+                        body = element
+                    elif tag == _W + "tr":
+                        rows.append([])
+                    elif tag == _W + "tc":
+                        cells.append([])
+                    continue
+
+                block = None
+                if tag == _W + "t":
+                    runs.append(element.text or "")
+                elif tag == _W + "tab":
+                    runs.append("\t")
+                elif tag in (_W + "br", _W + "cr"):
+                    runs.append("\n")
+                elif tag == _W + "p":
+                    block = "".join(runs).strip()
+                    runs = []
+                elif tag == _W + "tc":
+                    rows[-1].append(" ".join(cells.pop()))
+                elif tag == _W + "tr":
+                    block = " | ".join(cell for cell in rows.pop() if cell)
+                    element.clear()
+
+                if block:
+                    if cells:
+                        cells[-1].append(block)
+                    else:
+                        yield block
+                if tag in (_W + "p", _W + "tbl") and not rows and body is not None:
+                    body.clear()  # Drop finished top-level blocks
 
 class DocxParser(DocumentParser):
     """Parser for DOCX documents."""
-    
-    def parse(self, file_path: str) -> List[DocumentSection]:
+
+    def iter_sections(self, file_path: DocumentSource) -> Iterator[DocumentSection]:
+        """
+        Yield sections while the DOCX is still being read.
+
+        Blocks from iter_docx_blocks are buffered until a few sections' worth
+        of text is available, chunked, and all but the last chunk emitted; the
+        last one is carried over so sections can span the flush points.
+        """
+        buffer = []
+        buffered = 0
+        section_num = 0
+
+        for block in iter_docx_blocks(file_path):
+            buffer.append(block)
+            buffered += len(block)
+            if buffered < self.max_section_length * DOCX_BUFFER_SECTIONS:
+                continue
+
+            chunks = self._split_into_sections("\n\n".join(buffer))
+            for text in chunks[:-1]:
+                section_num += 1
+                yield DocumentSection(content=text, section_number=section_num)
+            buffer = chunks[-1:]
+            buffered = sum(len(text) for text in buffer)
+
+        for text in self._split_into_sections("\n\n".join(buffer)):
+            section_num += 1
+            yield DocumentSection(content=text, section_number=section_num)
+
+    def parse(self, file_path: DocumentSource) -> List[DocumentSection]:
         """
         Parse DOCX document and return sections.
         
         Args:
-            file_path (str): Path to the DOCX file
+            file_path (DocumentSource): Path to the DOCX file or its bytes
             
         Returns:
             List[DocumentSection]: List of document sections
 
         """
-
-        sections = []
         try:
-            doc = docx.Document(file_path)
-            
-            current_section = []
-            current_length = 0
-            section_num = 1
-            
-            for para in doc.paragraphs:
-                text = para.text.strip()
-                if not text:
-                    continue
-                
-                if current_length + len(text) > self.max_section_length and current_section:
-                    sections.append(DocumentSection(
-                        content='\n'.join(current_section),
-                        section_number=section_num
-                    ))
-                    current_section = []
-                    current_length = 0
-                    section_num += 1
-                
-                current_section.append(text)
-                current_length += len(text)
-            
-            if current_section:
-                sections.append(DocumentSection(
-                    content='\n'.join(current_section),
-                    section_number=section_num
-                ))
-                
+            return list(self.iter_sections(file_path))
         except Exception as e:
-            logger.error(f"Error reading DOCX file {file_path}: {str(e)}")
+            logger.error(f"Error reading DOCX file {describe_source(file_path)}: {str(e)}")
             raise
-        return sections
 
 class TxtParser(DocumentParser):
     """Parser for TXT documents."""
     
-    def parse(self, file_path: str) -> List[DocumentSection]:
+    def parse(self, file_path: DocumentSource) -> List[DocumentSection]:
         """
         Parse TXT document and return sections.
         
         Args:
-            file_path (str): Path to the TXT file
+            file_path (DocumentSource): Path to the TXT file or its bytes
             
         Returns:
             List[DocumentSection]: List of document sections
         """
         sections = []
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
+            if is_path_source(file_path):
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    text = file.read()
+            else:
+                text = bytes(file_path).decode('utf-8')
                 
             if not text.strip():
                 return []
@@ -242,22 +773,211 @@ class TxtParser(DocumentParser):
                 ))
                 
         except Exception as e:
-            logger.error(f"Error reading TXT file {file_path}: {str(e)}")
+            logger.error(f"Error reading TXT file {describe_source(file_path)}: {str(e)}")
             raise
             
         return sections
 
+def hash_file(file_path: DocumentSource) -> str:
+    """SHA-256 of a file's bytes, read in 1MB chunks."""
+    digest = hashlib.sha256()
+    with open_source(file_path) as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ParsedDocumentCache:
+    """
+    Two-tier cache of parsed sections keyed by file content.
+
+    Keys combine the SHA-256 of the uploaded bytes with the parser's
+    cache_signature (parser type and max_section_length). Recent documents are
+    kept in an in-memory LRU; every entry is also written as JSON under
+    ``cache_dir`` so other workers and restarts can reuse it. The disk tier is
+    trimmed to ``max_disk_bytes`` by least recent use.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = os.getenv("PARSE_CACHE_DIR", "cache/parsed"),
+        max_memory_entries: int = int(os.getenv("PARSE_CACHE_MEMORY_ENTRIES", "64")),
+        max_disk_bytes: int = int(os.getenv("PARSE_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(content_hash: str, signature: str) -> str:
+        return hashlib.sha256(f"{content_hash}:{signature}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[DocumentSection]]:
+        with self._lock:
+            sections = self._memory.get(key)
+            if sections is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return list(sections)
+
+        path = self._path(key)
+        try:
+            with path.open('r', encoding='utf-8') as file:
+                records = json.load(file)
+            os.utime(path)  # Mark as recently used for disk eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        sections = [DocumentSection(**record) for record in records]
+        self._remember(key, sections)
+        with self._lock:
+            self.hits += 1
+        return list(sections)
+
+    def put(self, key: str, sections: List[DocumentSection]):
+        self._remember(key, sections)
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            records = [
+                {"content": s.content, "page_number": s.page_number, "section_number": s.section_number}
+                for s in sections
+            ]
+            # Write to a temp file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(records, file)
+            os.replace(tmp_path, path)
+            self._trim_disk()
+        except OSError as e:
+            logger.warning(f"Could not write parse cache entry {key}: {e}")
+
+    def _remember(self, key: str, sections: List[DocumentSection]):
+        with self._lock:
+            self._memory[key] = list(sections)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
+
+parse_cache = ParsedDocumentCache()
+
+class CachedDocumentParser(DocumentParser):
+    """
+    Wraps any DocumentParser so repeat uploads of the same bytes skip parsing.
+
+    The content hash is computed from the file unless the caller already knows
+    it (for example from hashing the upload), in which case lookup() works
+    before the file is even written to disk.
+    """
+
+    def __init__(self, parser: DocumentParser, cache: ParsedDocumentCache, content_hash: Optional[str] = None):
+        super().__init__(max_section_length=parser.max_section_length)
+        self.parser = parser
+        self.cache = cache
+        self.content_hash = content_hash
+        self._known_miss = False
+
+    def __getattr__(self, name):
+        # Expose parser specific helpers (e.g. PDFParser.is_likely_scanned_pdf)
+        if name == "parser":
+            raise AttributeError(name)
+        return getattr(self.parser, name)
+
+    def cache_signature(self) -> str:
+        return self.parser.cache_signature()
+
+    def cache_key(self, file_path: Optional[DocumentSource] = None) -> str:
+        if self.content_hash is None:
+            if file_path is None:
+                raise ValueError("file_path is required when no content_hash was given")
+            self.content_hash = hash_file(file_path)
+        return self.cache.make_key(self.content_hash, self.cache_signature())
+
+    def lookup(self, file_path: Optional[DocumentSource] = None) -> Optional[List[DocumentSection]]:
+        """Cached sections for this document, or None."""
+        sections = self.cache.get(self.cache_key(file_path))
+        self._known_miss = sections is None
+        return sections
+
+    def parse(self, file_path: DocumentSource) -> List[DocumentSection]:
+        return list(self.iter_sections(file_path))
+
+    def iter_sections(self, file_path: DocumentSource) -> Iterator[DocumentSection]:
+        key = self.cache_key(file_path)
+        cached = None if self._known_miss else self.cache.get(key)
+        if cached is not None:
+            yield from cached
+            return
+
+        sections = []
+        for section in self.parser.iter_sections(file_path):
+            sections.append(section)
+            yield section
+        # Only complete parses are cached; an abandoned iteration never gets here
+        if getattr(self.parser, "ocr_failures", 0):
+            return  # Retry the failed OCR pages next time
+        self.cache.put(key, sections)
+
 class DocumentParserFactory:
     """Factory class for creating appropriate document parsers."""
     
     @staticmethod
-    def create_parser(file_path: str, max_section_length: int = 1000) -> DocumentParser:
+    def create_parser(
+        file_path: str,
+        max_section_length: int = 1000,
+        use_cache: bool = True,
+        content_hash: Optional[str] = None,
+        pdf_engine: Optional[str] = None
+    ) -> DocumentParser:
         """
         Create appropriate parser based on file extension.
         
         Args:
-            file_path (str): Path to the document
+            file_path (str): Path or filename of the document; only the
+                extension is used
             max_section_length (int): Maximum section length
+            use_cache (bool): Reuse sections parsed earlier from the same bytes
+            content_hash (Optional[str]): SHA-256 of the file, if already known
+            pdf_engine (Optional[str]): PDF text engine, see get_pdf_engine
             
         Returns:
             DocumentParser: Appropriate parser instance
@@ -273,4 +993,10 @@ class DocumentParserFactory:
         if not parser_class:
             raise ValueError(f"Unsupported file type: {file_extension}")
             
-        return parser_class(max_section_length=max_section_length)
+        if parser_class is PDFParser:
+            parser = PDFParser(max_section_length=max_section_length, engine=pdf_engine)
+        else:
+            parser = parser_class(max_section_length=max_section_length)
+        if not use_cache:
+            return parser
+        return CachedDocumentParser(parser, parse_cache, content_hash=content_hash)
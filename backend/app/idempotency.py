@@ -0,0 +1,52 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import os
+import time
+from typing import Optional
+from . import models
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60)))  # Seconds a key is remembered
+
+
+class IdempotencyConflict(Exception):
+    """Raised when a key is reused with a different request."""
+
+
+def get_idempotent_response(db: Session, user_id: int, key: str, request_hash: str) -> Optional[dict]:
+    """
+    Return the stored response for ``key`` or None if it has not completed yet.
+
+    Raises IdempotencyConflict if the key was used for a different request.
+    """
+    record = db.query(models.IdempotencyRecord).filter(
+        models.IdempotencyRecord.user_id == user_id,
+        models.IdempotencyRecord.key == key
+    ).first()
+    if record is None:
+        return None
+
+    if record.expires_at is not None and record.expires_at < time.time():
+        db.delete(record)
+        db.commit()
+        return None
+
+    if record.request_hash != request_hash:
+        raise IdempotencyConflict(key)
+    return record.response
+
+
+def save_idempotent_response(db: Session, user_id: int, key: str, request_hash: str, response: dict):
+    """
+    Remember ``response`` for ``key``. The first completed request wins.
+    """
+    db.add(models.IdempotencyRecord(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        response=response,
+        expires_at=time.time() + IDEMPOTENCY_TTL
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
@@ -0,0 +1,153 @@
+from pathlib import Path
+from typing import Optional, Union
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from fastapi import UploadFile
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read from the request per step
+UPLOAD_MEMORY_LIMIT = int(os.getenv("UPLOAD_MEMORY_LIMIT", str(4 * 1024 * 1024)))  # Larger uploads spill to disk
+
+
+class UploadTooLarge(Exception):
+    """The upload went over the size limit while it was being read."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"File size exceeds maximum limit of {max_size / 1024 / 1024}MB")
+        self.max_size = max_size
+
+
+class IngestedUpload:
+    """
+    An upload that has been read once, hashed and size-checked.
+
+    Small uploads stay in memory and never touch the disk. Larger ones are
+    spilled to a temporary file in ``spool_dir`` as they are read. Either way
+    ``source`` can be handed straight to a DocumentParser, and ``save`` puts
+    the bytes at their final path off the event loop.
+    """
+
+    def __init__(self, filename: str, content_type: Optional[str], size: int, sha256: str,
+                 data: Optional[bytearray] = None, spool_file=None):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.sha256 = sha256
+        self._data = data
+        self._spool_file = spool_file  # NamedTemporaryFile, removed on close or GC
+
+    @property
+    def in_memory(self) -> bool:
+        return self._spool_file is None
+
+    @property
+    def source(self) -> Union[str, memoryview]:
+        """The document for parsing: its bytes, or the spool file path."""
+        if self.in_memory:
+            return memoryview(self._data)
+        return self._spool_file.name
+
+    def save(self, path: Path) -> Path:
+        """
+        Write the upload to ``path``, replacing any existing file.
+
+        Spilled uploads are hard-linked into place when possible instead of
+        being copied.
+        """
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            if self.in_memory:
+                with tmp_path.open("wb") as buffer:
+                    buffer.write(self._data)
+            else:
+                self._spool_file.flush()
+                try:
+                    os.link(self._spool_file.name, tmp_path)
+                except OSError:
+                    shutil.copyfile(self._spool_file.name, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if tmp_path.exists():
+                os.remove(tmp_path)
+            raise
+        return path
+
+    async def asave(self, path: Path) -> Path:
+        return await asyncio.to_thread(self.save, path)
+
+    def read(self) -> bytes:
+        """All of the upload's bytes."""
+        if self.in_memory:
+            return bytes(self._data)
+        with open(self._spool_file.name, "rb") as file:
+            return file.read()
+
+    def close(self):
+        self._data = None
+        if self._spool_file is not None:
+            self._spool_file.close()
+
+
+async def ingest_upload(
+    file: UploadFile,
+    max_size: int,
+    spool_dir: Optional[Path] = None,
+    memory_limit: int = UPLOAD_MEMORY_LIMIT,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> IngestedUpload:
+    """
+    Read an upload in chunks, hashing it and enforcing ``max_size`` as it goes.
+
+    Raises UploadTooLarge before reading anything when the upload's known
+    size is over ``max_size``, and otherwise as soon as the bytes read pass
+    it, so an oversized file is neither hashed nor copied in full. (The
+    multipart body itself has already been received by then.) Once more than
+    ``memory_limit`` bytes have arrived the data moves to a temp file in
+    ``spool_dir``; those writes run in a worker thread.
+    """
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLarge(max_size)
+
+    digest = hashlib.sha256()
+    data = bytearray()
+    spool_file = None
+    size = 0
+
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLarge(max_size)
+            digest.update(chunk)
+
+            if spool_file is None and size > memory_limit:
+                spool_file = tempfile.NamedTemporaryFile(dir=spool_dir, prefix=".upload-", suffix=".part")
+                await asyncio.to_thread(spool_file.write, data)
+                data = None
+            if spool_file is None:
+                data += chunk
+            else:
+                await asyncio.to_thread(spool_file.write, chunk)
+
+        if spool_file is not None:
+            await asyncio.to_thread(spool_file.flush)
+    except BaseException:
+        if spool_file is not None:
+            spool_file.close()
+        raise
+
+    return IngestedUpload(
+        filename=file.filename,
+        content_type=file.content_type,
+        size=size,
+        sha256=digest.hexdigest(),
+        data=data,
+        spool_file=spool_file
+    )
@@ -3,6 +3,65 @@ import os
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 from langchain_google_genai import ChatGoogleGenerativeAI
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables once per process
+load_dotenv()
+
+
+class LLMRegistry:
+    """
+    Process-wide registry of chat clients keyed by (model, temperature,
+    max_tokens, timeout, max_retries); a None timeout or max_retries keeps
+    the client's default.
+
+    Clients are created once and shared by every request, so their HTTP/gRPC
+    connection pools stay warm. Lookups are lock-free; creation is guarded so
+    concurrent threads never build the same client twice.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, temperature: float, max_tokens: int,
+            timeout: Optional[float] = None, max_retries: Optional[int] = None):
+        key = (model_name, float(temperature), int(max_tokens), timeout, max_retries)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    limits = {}
+                    if timeout is not None:
+                        limits["timeout"] = timeout
+                    if max_retries is not None:
+                        limits["max_retries"] = max_retries
+                    client = ChatGoogleGenerativeAI(model=model_name,
+                                                    temperature=temperature,
+                                                    max_tokens=max_tokens,
+                                                    **limits)
+                    self._clients[key] = client
+        return client
+
+    def warm(self, configs):
+        """Create the clients for ``configs`` (tuples of get() arguments) up front, e.g. at app startup."""
+        for config in configs:
+            try:
+                self.get(*config)
+            except Exception as e:
+                logger.warning(f"Could not create LLM client for {config[0]}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+
+llm_registry = LLMRegistry()
 
 
 class LLMConfig:
@@ -10,10 +69,13 @@ class LLMConfig:
         self,
         model_name: str = "gemini-2.5-flash",
         temperature: float = 0.7,
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None
     ):
-        # Load environment variables
-        load_dotenv()
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = max_tokens
         
         # Get API key
         self.api_key = os.getenv("GOOGLE_API_KEY")
@@ -29,7 +91,6 @@ class LLMConfig:
         # )
 
 
-        self.llm = ChatGoogleGenerativeAI(model=model_name,
-                                          temperature=temperature,
-                                          max_tokens=max_tokens)
+        # Shared client from the process-wide registry
+        self.llm = llm_registry.get(model_name, temperature, max_tokens, timeout, max_retries)
 
@@ -6,15 +6,21 @@ import base64
 from io import BytesIO
 class ImageExtraction(LLMConfig):
     
-    def extractInfo(self, img_data_url, prompt):
+    def _buildMessage(self, img_data_url, prompt):
         prompt += " The above is the query and try extract relevant information from the image for further processing by a Agent in the next step. Keep your respose clean and simple but with information that can help the Reasoning Agent answer the question"
-        message = HumanMessage(
+        return HumanMessage(
             content=[
                 {"type": "text", "text": prompt},
                 {"type": "image_url", "image_url": {"url": img_data_url}}
             ]
         )
-        response = self.llm.invoke([message])
+
+    def extractInfo(self, img_data_url, prompt):
+        response = self.llm.invoke([self._buildMessage(img_data_url, prompt)])
+        return response.content
+
+    async def aextractInfo(self, img_data_url, prompt):
+        response = await self.llm.ainvoke([self._buildMessage(img_data_url, prompt)])
         return response.content
 
     def processImage(self, img_path, prompt):
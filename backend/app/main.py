@@ -3,12 +3,12 @@
 from fastapi import Query
 
 from datetime import timedelta
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Body, Form
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Body, Form, Header, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
-import shutil
 import os
 from pathlib import Path
 import asyncio
@@ -17,18 +17,61 @@ import platform
 import json
 import traceback
 import base64
+import hashlib
+import logging
+import uuid
+from contextlib import aclosing, asynccontextmanager
 from langchain_core.messages import HumanMessage
 from . import models, schemas  # Use relative imports
-from .database import get_db, engine
+from .database import get_db, engine, SessionLocal
 from .auth import security
-from .document_parser import DocumentParserFactory  # Remove backend prefix
+from .document_parser import DocumentParserFactory, DocumentTooLarge, shutdown_parse_pool  # Remove backend prefix
 from .quiz.quiz_generator import QuizGenerator
+from .llm.config import LLMConfig, llm_registry
+from .quiz.cache import QuizCache
+from .coalescing import RequestCoalescer
+from .idempotency import IdempotencyConflict, get_idempotent_response, save_idempotent_response
+from .quiz.jobs import enqueue_quiz_job, job_status, requeue_stale_jobs, start_quiz_workers
+from .ingest import IngestedUpload, UploadTooLarge, ingest_upload
+from .ocr import OCR_MAX_RETRIES, OCR_TIMEOUT
+from .ocr_cache import ocr_cache
+from .ContextRetrieval.context_retrieval import QdrantMemory, pack_context
 
 
+logger = logging.getLogger(__name__)
+
 # Create database tables
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+QUIZ_JOB_WORKERS = int(os.getenv("QUIZ_JOB_WORKERS", "1"))  # In-process job workers, 0 to disable
+
+# llm_registry.get() arguments of the clients used by quiz generation, doubt solving and OCR
+WARM_LLM_CONFIGS = [
+    ("gemini-2.5-flash", 0.2, 4096),
+    ("gemini-2.5-flash", 0.7, 1024),
+    ("gemini-2.5-flash", 0.2, 1024, OCR_TIMEOUT, OCR_MAX_RETRIES),
+]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the shared LLM clients once so requests reuse their connections
+    if os.getenv("GOOGLE_API_KEY"):
+        await asyncio.to_thread(llm_registry.warm, WARM_LLM_CONFIGS)
+
+    # Start in-process quiz job workers; jobs left running by a dead worker are requeued
+    stop_event = asyncio.Event()
+    workers = []
+    if QUIZ_JOB_WORKERS > 0:
+        await asyncio.to_thread(requeue_stale_jobs)
+        workers = start_quiz_workers(QUIZ_JOB_WORKERS, stop_event)
+    yield
+    stop_event.set()
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    shutdown_parse_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -47,6 +90,13 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 QUIZ_GENERATION_TIMEOUT = 120  # Increase timeout to 120 seconds
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 MAX_SECTIONS = 10
+QUIZ_CONCURRENCY = int(os.getenv("QUIZ_CONCURRENCY", "4"))  # Sections generated in parallel
+
+# Section-level cache of generated questions, shared by all workers through the DB
+quiz_cache = QuizCache()
+
+# Merges identical /api/generate-quiz requests that are in flight at the same time
+quiz_coalescer = RequestCoalescer()
 
 @app.post("/login", response_model=schemas.Token)
 async def login_for_access_token(
@@ -115,124 +165,133 @@ async def read_users_me(
 async def root():
     return {"message": "Hello World"}
 
-@app.post("/api/generate-quiz")
-async def generate_quiz_from_document(
-    file: UploadFile = File(...),
-    questions_per_section: int = 3,
-    current_user: models.User = Depends(security.get_current_active_user),
-    db: Session = Depends(get_db)
-):
+async def read_upload(file: UploadFile) -> IngestedUpload:
     """
-    Generate quiz questions from uploaded document with timeout and size checks.
-    """
-
-    start_time = time.time()
-    file_path = None
+    Read, hash and size-check an upload in one pass.
 
+    Small files stay in memory; larger ones are spooled into UPLOAD_DIR so
+    saving them later is a rename-free hard link.
+    """
     try:
-        # Check file size
-        file.file.seek(0, 2)  # Seek to end
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset file pointer
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size exceeds maximum limit of {MAX_FILE_SIZE / 1024 / 1024}MB"
-            )
-
-        # Save uploaded file
-        file_path = UPLOAD_DIR / file.filename
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        return await ingest_upload(file, MAX_FILE_SIZE, spool_dir=UPLOAD_DIR)
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
 
-        # Create parser with timeout
-        parser = DocumentParserFactory.create_parser(
-            str(file_path),
-            max_section_length=1000
+async def iter_quiz_sections(upload: IngestedUpload, parsed: list, parse_done: asyncio.Event):
+    """
+    Yield the sections of an upload as they are parsed.
+
+    Sections reach generation while the rest of the document is still being
+    parsed. Parsing stops with a 413 at the first section over MAX_SECTIONS,
+    which also cancels generation still running for the earlier ones. Every
+    section is appended to ``parsed`` and ``parse_done`` is set once the
+    whole document was parsed, so callers can tell a document without text
+    from one whose parsing ran out of time.
+    """
+    parser = DocumentParserFactory.create_parser(
+        upload.filename,
+        max_section_length=1000,
+        content_hash=upload.sha256
+    )
+    try:
+        async with aclosing(parser.aiter_sections(upload.source)) as sections:
+            async for section in sections:
+                parsed.append(section)
+                if len(parsed) > MAX_SECTIONS:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Document contains too many sections (max {MAX_SECTIONS})"
+                    )
+                yield section
+    except DocumentTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Document is too large to process"
         )
+    parse_done.set()
 
-        # Parse document with timeout
-        try:
-            sections = parser.parse(str(file_path))
+def no_text_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="No text could be extracted from the document"
+    )
 
-            if len(sections) > MAX_SECTIONS:
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail=f"Document contains too many sections (max {MAX_SECTIONS})"
-                )
+def generation_timeout_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_408_REQUEST_TIMEOUT,
+        detail="Quiz generation is taking too long. Please try with fewer sections."
+    )
 
-        except asyncio.TimeoutError:
-            raise HTTPException(
-                status_code=status.HTTP_408_REQUEST_TIMEOUT,
-                detail="Document parsing is taking too long. Please try with a smaller document."
-            )
+def save_quiz(db: Session, user_id: int, filename: str, file_path: Path, quiz_results: list) -> models.Quiz:
+    quiz = models.Quiz(
+        title=filename.split('.')[0],  # Use filename without extension as title
+        content=quiz_results,
+        user_id=user_id,
+        filename=filename,
+        file_path=str(file_path)  # Keep file for download
+    )
+    db.add(quiz)
+    db.commit()
+    db.refresh(quiz)
+    return quiz
 
-        # Check remaining time
-        elapsed_time = time.time() - start_time
-        remaining_time = QUIZ_GENERATION_TIMEOUT - elapsed_time
+async def run_quiz_generation(upload: IngestedUpload, questions_per_section: int, user_id: int) -> dict:
+    """
+    Save, parse and generate a quiz for one upload and return the response body.
 
-        if remaining_time < 10:  # If less than 10 seconds remaining
-            raise HTTPException(
-                status_code=status.HTTP_408_REQUEST_TIMEOUT,
-                detail="Not enough time remaining to generate questions. Please try with a smaller document."
-            )
+    Runs with its own DB session because coalesced callers share the result,
+    and closes the upload when done since it may outlive the request.
+    """
 
+    start_time = time.time()
+    file_path = None
+    db = SessionLocal()
 
-        # Initialize quiz generator
-        quiz_generator = QuizGenerator()
-        quiz_results = []
+    try:
+        file_path = await upload.asave(UPLOAD_DIR / upload.filename)
 
-        # Generate questions with dynamic timeout
-        try:
-            time_per_section = remaining_time / len(sections)
-            for section in sections:
-                questions = await asyncio.wait_for(
-                    quiz_generator.generateQuiz(
-                        context=section.content,
-                        N=min(questions_per_section, 5)  # Limit questions per section
-                    ),
-                    timeout=time_per_section
-                )
-                quiz_results.append(questions)
-
-                # Update remaining time
-                elapsed_time = time.time() - start_time
-                if elapsed_time > QUIZ_GENERATION_TIMEOUT * 0.9:  # 90% of timeout
-                    break
-
-        except asyncio.TimeoutError:
-            if quiz_results:  # Return partial results if we have any
-                return {
-                    "data": quiz_results,
-                    "warning": "Some sections were skipped due to time constraints"
-                }
-            raise HTTPException(
-                status_code=status.HTTP_408_REQUEST_TIMEOUT,
-                detail="Quiz generation is taking too long. Please try with fewer sections."
-            )
+        # Initialize quiz generator
+        quiz_generator = QuizGenerator(cache=quiz_cache)
+
+        # Sections are generated while the rest of the document is parsed
+        parsed = []
+        parse_done = asyncio.Event()
+        section_results = {}
+        async with aclosing(quiz_generator.iterQuizzesFromStream(
+            iter_quiz_sections(upload, parsed, parse_done),
+            N=min(questions_per_section, 5),  # Limit questions per section
+            concurrency=QUIZ_CONCURRENCY,
+            timeout=QUIZ_GENERATION_TIMEOUT - (time.time() - start_time)
+        )) as results:
+            async for index, section, questions in results:
+                if questions is not None:
+                    section_results[index] = questions
+        quiz_results = [section_results[index] for index in sorted(section_results)]
+
+        # Without parse_done the deadline passed before parsing finished
+        if parse_done.is_set() and not parsed:
+            raise no_text_error()
+        if not quiz_results:
+            raise generation_timeout_error()
+        warning = None
+        if len(quiz_results) < len(parsed) or not parse_done.is_set():
+            warning = "Some sections were skipped due to time constraints"
 
-        finally:
-            # Don't clean up file yet - we need to save it for download
-            pass
-            
         # Save quiz to database
         try:
-            quiz = models.Quiz(
-                title=file.filename.split('.')[0],  # Use filename without extension as title
-                content=quiz_results,
-                user_id=current_user.id,
-                filename=file.filename,
-                file_path=str(file_path)  # Keep file for download
-            )
-            db.add(quiz)
-            db.commit()
-            db.refresh(quiz)
+            quiz = save_quiz(db, user_id, upload.filename, file_path, quiz_results)
             
-            return {
+            response = {
                 "quiz_id": quiz.id,
                 "data": quiz_results,
                 "processing_time": round(time.time() - start_time, 2)
             }
+            if warning:
+                response["warning"] = warning
+            return response
         except Exception as e:
             # If database save fails, clean up file and continue
             if file_path and file_path.exists():
@@ -256,6 +315,290 @@ async def generate_quiz_from_document(
             detail=f"An error occurred during quiz generation: {str(e)}"
         )
 
+    finally:
+        upload.close()
+        db.close()
+
+@app.post("/api/generate-quiz")
+async def generate_quiz_from_document(
+    file: UploadFile = File(...),
+    questions_per_section: int = 3,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: models.User = Depends(security.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Generate quiz questions from uploaded document with timeout and size checks.
+
+    Identical requests in flight (same user, file contents, filename and
+    parameters) share one generation. With an Idempotency-Key header, a completed result
+    is replayed instead of generating again.
+    """
+    upload = await read_upload(file)
+    handed_off = False  # Set once generation starts; it then owns and closes the upload
+
+    def start_generation():
+        nonlocal handed_off
+        handed_off = True
+        return run_quiz_generation(upload, questions_per_section, user_id)
+
+    try:
+        file_hash = upload.sha256
+        request_hash = hashlib.sha256(f"{file_hash}:{questions_per_section}".encode()).hexdigest()
+
+        if idempotency_key:
+            try:
+                replay = get_idempotent_response(db, current_user.id, idempotency_key, request_hash)
+            except IdempotencyConflict:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used with a different request"
+                )
+            if replay is not None:
+                return JSONResponse(content=replay, headers={"Idempotent-Replayed": "true"})
+
+        user_id = current_user.id
+        # The filename is part of the key because the saved quiz is titled and stored under it
+        response = await quiz_coalescer.run(
+            (user_id, file_hash, upload.filename, questions_per_section), start_generation
+        )
+    finally:
+        # Replays and coalesced followers never hand their copy to generation
+        if not handed_off:
+            upload.close()
+
+    if idempotency_key and "quiz_id" in response:
+        save_idempotent_response(db, user_id, idempotency_key, request_hash, response)
+    return response
+
+@app.post("/api/generate-quiz/stream")
+async def generate_quiz_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    questions_per_section: int = 3,
+    current_user: models.User = Depends(security.get_current_active_user)
+):
+    """
+    Streaming variant of /api/generate-quiz.
+
+    Emits one "section" event per section as soon as its questions pass
+    validation, then a "done" event with the saved quiz_id and timings, or an
+    "error" event (e.g. too many sections) with a status_code and detail.
+    Responds with NDJSON, or Server-Sent Events when the client sends
+    "Accept: text/event-stream". The saved Quiz matches the non-streaming
+    endpoint: sections in document order, timed-out sections left out.
+    """
+    start_time = time.time()
+    file_path = None
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    user_id = current_user.id
+    filename = file.filename
+
+    upload = await read_upload(file)
+    try:
+        file_path = await upload.asave(UPLOAD_DIR / filename)
+    except Exception as e:
+        upload.close()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred during quiz generation: {str(e)}"
+        )
+
+    def encode(event: str, payload: dict) -> str:
+        if use_sse:
+            return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+        return json.dumps({"event": event, **payload}, default=str) + "\n"
+
+    async def event_stream():
+        quiz_generator = QuizGenerator(cache=quiz_cache)
+        parsed = []
+        parse_done = asyncio.Event()
+        section_results = {}
+        first_section_time = None
+        saved = False
+
+        try:
+            # Sections are generated while the rest of the document is parsed
+            async with aclosing(quiz_generator.iterQuizzesFromStream(
+                iter_quiz_sections(upload, parsed, parse_done),
+                N=min(questions_per_section, 5),  # Limit questions per section
+                concurrency=QUIZ_CONCURRENCY,
+                timeout=QUIZ_GENERATION_TIMEOUT - (time.time() - start_time)
+            )) as results:
+                async for index, section, questions in results:
+                    if questions is None:
+                        continue
+                    section_results[index] = questions
+                    if first_section_time is None:
+                        first_section_time = time.time() - start_time
+                    yield encode("section", {
+                        "section_index": index,
+                        "page_number": section.page_number,
+                        "questions": questions,
+                        "elapsed": round(time.time() - start_time, 2)
+                    })
+
+            # Without parse_done the deadline passed before parsing finished
+            if parse_done.is_set() and not parsed:
+                raise no_text_error()
+            quiz_results = [section_results[index] for index in sorted(section_results)]
+            if not quiz_results:
+                raise generation_timeout_error()
+
+            done = {
+                "quiz_id": None,
+                "data": quiz_results,
+                "timings": {
+                    "first_section": round(first_section_time, 2),
+                    "total": round(time.time() - start_time, 2)
+                }
+            }
+            if len(quiz_results) < len(parsed) or not parse_done.is_set():
+                done["warning"] = "Some sections were skipped due to time constraints"
+
+            # The request-scoped session may already be closed while streaming
+            db = SessionLocal()
+            try:
+                done["quiz_id"] = save_quiz(db, user_id, filename, file_path, quiz_results).id
+                saved = True
+            except Exception:
+                done["warning"] = "Quiz generated but not saved to history"
+            finally:
+                db.close()
+
+            done["timings"]["total"] = round(time.time() - start_time, 2)
+            yield encode("done", done)
+
+        except HTTPException as he:
+            yield encode("error", {"status_code": he.status_code, "detail": he.detail})
+        except Exception as e:
+            traceback.print_exc()
+            yield encode("error", {
+                "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "detail": f"An error occurred during quiz generation: {str(e)}"
+            })
+        finally:
+            # Also runs when the client disconnects mid-stream (GeneratorExit/CancelledError)
+            upload.close()
+            if not saved and file_path.exists():
+                os.remove(file_path)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson"
+    )
+
+@app.post("/api/quiz-jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_quiz_job(
+    file: UploadFile = File(...),
+    questions_per_section: int = 3,
+    current_user: models.User = Depends(security.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue quiz generation for an uploaded document and return the job id.
+
+    Generation runs on the job workers without the request timeout, so larger
+    documents than /api/generate-quiz accepts can be processed. Poll
+    /api/quiz-jobs/{job_id} for progress.
+    """
+    file_path = None
+    try:
+        # Reject unsupported file types before queueing
+        DocumentParserFactory.create_parser(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    upload = await read_upload(file)
+    try:
+        # The job reads its input later, so it gets a name no other upload can reuse
+        stored_name = f"job_{uuid.uuid4().hex}{Path(file.filename).suffix.lower()}"
+        file_path = await upload.asave(UPLOAD_DIR / stored_name)
+        job = enqueue_quiz_job(db, current_user.id, file.filename, str(file_path), questions_per_section)
+        return {"job_id": job.id, "status": job.status}
+    except HTTPException:
+        if file_path and file_path.exists():
+            os.remove(file_path)
+        raise
+    except Exception as e:
+        if file_path and file_path.exists():
+            os.remove(file_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue quiz generation: {str(e)}"
+        )
+    finally:
+        upload.close()
+
+@app.get("/api/quiz-jobs/{job_id}")
+async def get_quiz_job(
+    job_id: int,
+    current_user: models.User = Depends(security.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    job = db.query(models.QuizJob).filter(
+        models.QuizJob.id == job_id,
+        models.QuizJob.user_id == current_user.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Quiz job not found")
+    return job_status(job)
+
+@app.get("/api/quiz-cache/stats")
+async def get_quiz_cache_stats(
+    current_user: models.User = Depends(security.get_current_active_user)
+):
+    return await asyncio.to_thread(quiz_cache.stats)
+
+@app.get("/api/ocr-cache/stats")
+async def get_ocr_cache_stats(
+    current_user: models.User = Depends(security.get_current_active_user)
+):
+    return ocr_cache.stats()
+
+DOUBT_CONTEXT_TOKENS = int(os.getenv("DOUBT_CONTEXT_TOKENS", "600"))  # Budget for attached PDF context in a doubt prompt
+DOUBT_CONTEXT_SECTIONS = int(os.getenv("DOUBT_CONTEXT_SECTIONS", "8"))  # Best matching sections considered
+
+def select_pdf_context(question: str, sections, user_id: int, document_id: str) -> str:
+    """
+    Pick the parts of an attached PDF that are relevant to the question.
+
+    The sections are indexed once per user and document in the shared vector
+    store, so follow-up turns on the same PDF only embed the question;
+    sections that failed to embed are retried on the next turn. The best
+    matches are packed under DOUBT_CONTEXT_TOKENS. If retrieval fails the
+    leading sections are packed instead.
+    """
+    try:
+        memory = QdrantMemory(session_id=f"doubt-{user_id}", user_id=user_id, document_id=document_id)
+        texts = [section.content for section in sections]
+        # Points are keyed by text, so repeated sections share one point
+        if memory.document_size(document_id) < len(set(texts)):
+            errors = memory.add_context(
+                texts,
+                metadata=[{"page_number": section.page_number} for section in sections]
+            )
+            if errors:
+                logger.warning(
+                    f"Could not index {len(errors)} of {len(texts)} sections of {document_id}: "
+                    f"{next(iter(errors.values()))}"
+                )
+        context = memory.get_relevant_context(
+            question,
+            max_tokens=DOUBT_CONTEXT_TOKENS,
+            limit=DOUBT_CONTEXT_SECTIONS,
+            document_id=document_id
+        )
+        if context:
+            return context
+    except Exception as e:
+        logger.exception(f"Context retrieval failed, using the leading sections: {str(e)}")
+
+    return pack_context(
+        (f"Page {section.page_number}: {section.content}" for section in sections[:DOUBT_CONTEXT_SECTIONS]),
+        DOUBT_CONTEXT_TOKENS
+    )
+
 @app.post("/api/solve-doubt")
 async def solve_doubt(
     question: str = Form(None),
@@ -278,27 +621,28 @@ async def solve_doubt(
         pdf_content = None
         if context_pdf is not None:
             try:
-                file_path = UPLOAD_DIR / context_pdf.filename
-                with file_path.open("wb") as buffer:
-                    shutil.copyfileobj(context_pdf.file, buffer)
-
-                # Create parser
-                parser = DocumentParserFactory.create_parser(
-                    str(file_path),
-                    max_section_length=1000
-                )
-                sections = parser.parse(str(file_path))
+                # Follow-up turns re-send the same PDF; reuse its parsed sections
+                upload = await read_upload(context_pdf)
+                try:
+                    parser = DocumentParserFactory.create_parser(
+                        context_pdf.filename,
+                        max_section_length=1000,
+                        content_hash=upload.sha256
+                    )
+                    sections = await asyncio.to_thread(parser.lookup)
+                    if sections is None:
+                        # Parsed straight from the upload buffer, nothing is kept on disk
+                        sections = await asyncio.to_thread(parser.parse, upload.source)
+                finally:
+                    upload.close()
                 
-                # Combine PDF content
-                pdf_text = ""
-                for section in sections[:5]:  # Limit to first 5 sections
-                    pdf_text += f"Page {section.page_number}: {section.content}\n\n"
+                # Only the sections relevant to the question go into the prompt
+                pdf_text = await asyncio.to_thread(
+                    select_pdf_context, question, sections, current_user.id, upload.sha256
+                )
                 
                 if pdf_text:
-                    question = f"{question}\n\nContext from PDF: {pdf_text}"
-                
-                # Clean up PDF file after processing
-                os.remove(file_path)
+                    question = f"{question}\n\n{pdf_text}"
             except Exception as e:
                 pass
 
@@ -360,7 +704,6 @@ async def solve_doubt(
 
 
         # Generate response using LLM directly
-        from .llm.config import LLMConfig
         llm_config = LLMConfig()
         
         # Use HumanMessage if image is provided, otherwise use simple string
@@ -374,12 +717,12 @@ async def solve_doubt(
             
             # Use HumanMessage for multimodal input
             human_message = HumanMessage(content=message_content)
-            response = llm_config.llm.invoke([human_message])
+            response = await llm_config.llm.ainvoke([human_message])
             
           
         else:
             # Use simple string invocation for text-only
-            response = llm_config.llm.invoke(prompt)
+            response = await llm_config.llm.ainvoke(prompt)
             
         # Enhanced response parsing
         answer = None
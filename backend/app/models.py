@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, JSON, DateTime, Text, Float
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, JSON, DateTime, Text, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -58,4 +58,50 @@ class Doubt(Base):
     context_filename = Column(String(255))  # If PDF/image was uploaded
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    user = relationship("User", back_populates="doubts")
\ No newline at end of file
+    user = relationship("User", back_populates="doubts")
+
+class QuizCacheEntry(Base):
+    __tablename__ = "quiz_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True)  # sha256 of normalized section + settings
+    questions = Column(JSON)
+    model_name = Column(String(255))
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class QuizJob(Base):
+    __tablename__ = "quiz_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    status = Column(String(20), default="queued", index=True)  # queued, running, completed, failed
+    filename = Column(String(255))
+    file_path = Column(String(500))
+    questions_per_section = Column(Integer, default=3)
+    total_sections = Column(Integer, default=0)
+    completed_sections = Column(Integer, default=0)
+    progress = Column(JSON)  # Per-section status and generated questions
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=True)
+    error = Column(Text)
+    attempts = Column(Integer, default=0)
+    worker_id = Column(String(255))
+    heartbeat_at = Column(Float)  # Unix time of the last worker heartbeat
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    user = relationship("User")
+    quiz = relationship("Quiz")
+
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    key = Column(String(255))  # Client supplied Idempotency-Key header
+    request_hash = Column(String(64))  # Hash of the file and parameters the key was first used with
+    response = Column(JSON)
+    expires_at = Column(Float, index=True)  # Unix time after which the key can be reused
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
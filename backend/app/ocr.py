@@ -1,29 +1,121 @@
+import asyncio
+import base64
+import os
+from dataclasses import dataclass
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Sequence
 from langchain_core.messages import HumanMessage
 from PIL import Image
 from io import BytesIO
+from pathlib import Path
 import fitz # PyMuPDF
 from .llm.config import LLMConfig
+from .document_parser import DocumentSource, is_path_source, submit_to_parse_pool
+from .ocr_cache import OCRCache, ocr_cache, page_hash
 
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "4"))  # OCR calls in flight per document
+OCR_RENDER_DPI = int(os.getenv("OCR_RENDER_DPI", "150"))
+OCR_MAX_IMAGE_SIDE = int(os.getenv("OCR_MAX_IMAGE_SIDE", "1600"))  # Pixels on the longer side
+OCR_TARGET_IMAGE_BYTES = int(os.getenv("OCR_TARGET_IMAGE_BYTES", str(96 * 1024)))
+OCR_PAGES_PER_TASK = int(os.getenv("OCR_PAGES_PER_TASK", "4"))
+# OCR runs inside document parsing, so each call is bounded instead of using the client's defaults
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "30"))  # Seconds per OCR call
+OCR_MAX_RETRIES = int(os.getenv("OCR_MAX_RETRIES", "1"))
+OCR_PAGE_PROMPT = "Extract all text from this page."
+
+JPEG_QUALITIES = (85, 70, 55, 40)
+
+
+def compress_page_image(image: Image.Image, max_side: int = OCR_MAX_IMAGE_SIDE,
+                        target_bytes: int = OCR_TARGET_IMAGE_BYTES) -> bytes:
+    """
+    Grayscale, downscale and JPEG-encode a page image to about ``target_bytes``.
+
+    Quality is lowered step by step first; if the smallest quality is still
+    too big the image is shrunk further. Text stays legible for OCR well
+    below the default PNG size.
+    """
+    image = image.convert("L")
+    image.thumbnail((max_side, max_side))
+
+    while True:
+        for quality in JPEG_QUALITIES:
+            buffer = BytesIO()
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= target_bytes:
+                return buffer.getvalue()
+        if max(image.size) <= 600:
+            return buffer.getvalue()  # Smaller than this stops being readable
+        image = image.resize((image.width * 3 // 4, image.height * 3 // 4))
+
+
+@dataclass
+class RenderedPage:
+    """A page image ready to send for OCR, with its perceptual hash."""
+    image: bytes
+    phash: str
+
+
+def render_page_images(file_path: DocumentSource, page_indices: Sequence[int],
+                       dpi: int = OCR_RENDER_DPI) -> List[RenderedPage]:
+    """
+    Render the given 0-based pages straight to grayscale and compress them.
+
+    The perceptual hash is taken from the uncompressed render. Module-level
+    so it can run in the shared process pool.
+    """
+    doc = fitz.open(file_path) if is_path_source(file_path) else fitz.open(stream=file_path, filetype="pdf")
+    try:
+        images = []
+        for page_index in page_indices:
+            pix = doc.load_page(page_index).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+            images.append(RenderedPage(image=compress_page_image(image), phash=page_hash(image)))
+        return images
+    finally:
+        doc.close()
+
+
+def page_count(file_path: DocumentSource) -> int:
+    doc = fitz.open(file_path) if is_path_source(file_path) else fitz.open(stream=file_path, filetype="pdf")
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
 
 
 class OCR(LLMConfig):
+
+    # Renders in-memory PDFs; files on disk use the shared process pool
+    _render_threads = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="ocr-render")
+    # Single pages OCR'd on behalf of PDFParser, which runs outside the event loop
+    _page_threads = ThreadPoolExecutor(max_workers=max(1, OCR_CONCURRENCY), thread_name_prefix="ocr-page")
  
     def __init__(
         self,
         model_name: str = "gemini-2.5-flash",
         temperature: float = 0.2,
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        cache: Optional[OCRCache] = ocr_cache
     ):
         """
         Initialize OCR with LLM configuration.
+
+        Args:
+            cache (OCRCache): Page text cache consulted before each page's
+                OCR call; None disables it
         """
         super().__init__(
             model_name=model_name,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            timeout=OCR_TIMEOUT,
+            max_retries=OCR_MAX_RETRIES
         )
         self.finalResult = {}
+        self.cache = cache
+        self.cache_scope = OCRCache.make_scope(model_name, OCR_PAGE_PROMPT)
  
     def extract_text(self, image_path: str) -> str:
         """
@@ -55,47 +147,183 @@ class OCR(LLMConfig):
         except Exception as e:
             print(f"Error processing image: {e}")
             return ""
+
+    async def aextract_text(self, image_path: str) -> str:
+        """
+        Async variant of extract_text that does not block the event loop.
+
+        Args:
+            image_path (str): The path to the image file.
+
+        Returns:
+            str: The extracted text.
+        """
+        try:
+            image_data = await asyncio.to_thread(Path(image_path).read_bytes)
+            image_b64 = base64.b64encode(image_data).decode("utf-8")
+
+            message = HumanMessage(
+                content=[
+                    {"type": "text", "text": "Extract all text from the image."},
+                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}},
+                ]
+            )
+
+            response = await self.llm.ainvoke([message])
+            return response.content
+
+        except Exception as e:
+            print(f"Error processing image: {e}")
+            return ""
  
-    def extract_text_from_file(self, file_path: str) -> str:
+    def extract_text_from_file(self, file_path: DocumentSource) -> str:
         """
         Extract text from a file (e.g., PDF) using OCR via LangChain.
+
+        Pages are rendered in the shared process pool and OCR'd by up to
+        OCR_CONCURRENCY threads; the text is joined in page order.
  
         Args:
-            file_path (str): The path to the PDF file.
+            file_path (DocumentSource): The path to the PDF file or its bytes.
  
         Returns:
             str: The extracted text.
         """
         try:
-            doc = fitz.open(file_path)
-            full_text = []
- 
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                pix = page.get_pixmap()
-                
-                # Convert the page to an in-memory image
-                image_bytes = pix.tobytes("png")
-                image_b64 = base64.b64encode(image_bytes).decode("utf-8")
-                
-                # Create a HumanMessage with a text part and an in-memory image part
-                message = HumanMessage(
-                    content=[
-                        {"type": "text", "text": "Extract all text from this page."},
-                        {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}}
-                    ]
-                )
- 
-                # Invoke the LLM with the multimodal message
-                response = self.llm.invoke([message])
-                full_text.append(response.content)
-            
-            doc.close()
+            page_indices = list(range(page_count(file_path)))
+            images = [
+                image
+                for batch in self._render_batches(file_path, page_indices)
+                for image in batch.result()
+            ]
+            with ThreadPoolExecutor(max_workers=max(1, OCR_CONCURRENCY)) as executor:
+                full_text = list(executor.map(self._ocr_image, images))
             return "\n\n".join(full_text)
  
         except Exception as e:
             print(f"An error occurred: {e}")
             return ""
+
+    async def aextract_text_from_file(self, file_path: DocumentSource) -> str:
+        """
+        Async variant of extract_text_from_file.
+
+        Page rendering runs outside the event loop and the LLM calls are
+        awaited concurrently, so the event loop keeps serving other requests
+        while a document is OCR'd.
+
+        Args:
+            file_path (DocumentSource): The path to the PDF file or its bytes.
+
+        Returns:
+            str: The extracted text.
+        """
+        try:
+            return "\n\n".join(await self.aextract_pages(file_path))
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return ""
+
+    async def aextract_pages(self, file_path: DocumentSource,
+                             page_indices: Optional[Sequence[int]] = None) -> List[str]:
+        """
+        OCR the given 0-based pages (all pages by default).
+
+        Pages are rendered in batches of OCR_PAGES_PER_TASK; each page's OCR
+        call starts as soon as its batch is rendered, with at most
+        OCR_CONCURRENCY calls in flight. The result has one entry per page in
+        the order of ``page_indices``; pages whose call failed are "".
+        """
+        if page_indices is None:
+            page_indices = range(await asyncio.to_thread(page_count, file_path))
+        page_indices = list(page_indices)
+        semaphore = asyncio.Semaphore(max(1, OCR_CONCURRENCY))
+
+        async def ocr(page):
+            async with semaphore:
+                return await self._aocr_image(page)
+
+        async def run_batch(future):
+            images = await asyncio.wrap_future(future)
+            return await asyncio.gather(*(ocr(image) for image in images))
+
+        batches = await asyncio.gather(*(
+            run_batch(future) for future in self._render_batches(file_path, page_indices)
+        ))
+        return [text for batch in batches for text in batch]
+
+    def ocr_page(self, file_path: DocumentSource, page_index: int) -> str:
+        """
+        Render and OCR one 0-based page.
+
+        Unlike the whole-document helpers this raises when the OCR call fails,
+        so callers can tell a failed page from an empty one.
+        """
+        return self._recognize(render_page_images(file_path, [page_index])[0])
+
+    def submit_page(self, file_path: DocumentSource, page_index: int) -> Future:
+        """Run ocr_page on the OCR thread pool (at most OCR_CONCURRENCY at once)."""
+        return OCR._page_threads.submit(self.ocr_page, file_path, page_index)
+
+    @staticmethod
+    def _render_batches(file_path: DocumentSource, page_indices: Sequence[int]) -> list:
+        """
+        Submit rendering of ``page_indices`` in OCR_PAGES_PER_TASK batches.
+
+        Files on disk go to the shared process pool; in-memory PDFs are
+        rendered in threads so their bytes are not copied to every worker.
+        """
+        submit = submit_to_parse_pool if is_path_source(file_path) else OCR._render_threads.submit
+        return [
+            submit(render_page_images, file_path, page_indices[start:start + OCR_PAGES_PER_TASK])
+            for start in range(0, len(page_indices), OCR_PAGES_PER_TASK)
+        ]
+
+    @staticmethod
+    def _page_message(image_bytes: bytes) -> HumanMessage:
+        image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+        return HumanMessage(
+            content=[
+                {"type": "text", "text": OCR_PAGE_PROMPT},
+                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_b64}"}}
+            ]
+        )
+
+    def _recognize(self, page: RenderedPage) -> str:
+        """OCR one rendered page through the cache; raises if the call fails."""
+        if self.cache is not None:
+            text = self.cache.get(page.phash, self.cache_scope)
+            if text is not None:
+                return text
+        text = self.llm.invoke([self._page_message(page.image)]).content
+        if self.cache is not None and text.strip():
+            self.cache.put(page.phash, self.cache_scope, text)
+        return text
+
+    async def _arecognize(self, page: RenderedPage) -> str:
+        if self.cache is not None:
+            text = await asyncio.to_thread(self.cache.get, page.phash, self.cache_scope)
+            if text is not None:
+                return text
+        response = await self.llm.ainvoke([self._page_message(page.image)])
+        text = response.content
+        if self.cache is not None and text.strip():
+            await asyncio.to_thread(self.cache.put, page.phash, self.cache_scope, text)
+        return text
+
+    def _ocr_image(self, page: RenderedPage) -> str:
+        try:
+            return self._recognize(page)
+        except Exception as e:
+            print(f"Error processing page: {e}")
+            return ""
+
+    async def _aocr_image(self, page: RenderedPage) -> str:
+        try:
+            return await self._arecognize(page)
+        except Exception as e:
+            print(f"Error processing page: {e}")
+            return ""
         
 
 # o = OCR(model_name="gemini-2.5-flash", temperature=0.1, max_tokens=1024)
@@ -0,0 +1,185 @@
+from pathlib import Path
+from typing import Dict, Optional, Union
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_HASH_SIZE = 16  # dHash grid, 16x16 = 256 bits
+OCR_CACHE_MAX_DISTANCE = int(os.getenv("OCR_CACHE_MAX_DISTANCE", "8"))  # Bits that may differ for a near match
+OCR_CACHE_MIN_DETAIL_BITS = 32  # Sparser dHashes (near-blank pages) are not distinctive enough
+
+
+def dhash(image: Image.Image, hash_size: int = OCR_CACHE_HASH_SIZE) -> str:
+    """
+    Difference hash of an image as a hex string.
+
+    The image is shrunk to a (hash_size + 1) x hash_size grayscale grid and
+    each bit records whether a cell is brighter than its right neighbour.
+    Re-exports of the same page at another resolution or JPEG quality land
+    within about ten bits of each other; distinct pages of a syllabus differ
+    in twenty or more.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    pixels = small.tobytes()
+    value = 0
+    for y in range(hash_size):
+        row = pixels[y * (hash_size + 1):(y + 1) * (hash_size + 1)]
+        for x in range(hash_size):
+            value = (value << 1) | (row[x] > row[x + 1])
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def page_hash(image: Image.Image) -> str:
+    """
+    Cache key for a rendered page.
+
+    Normally the dHash. Near-blank pages (a stamp or a few words) all hash to
+    almost the same dHash, so those are keyed by the exact pixels instead and
+    only ever match an identical render.
+    """
+    value = dhash(image)
+    if int(value, 16).bit_count() >= OCR_CACHE_MIN_DETAIL_BITS:
+        return value
+    return hashlib.sha256(image.convert("L").tobytes()).hexdigest()
+
+
+class OCRCache:
+    """
+    Disk cache of OCR text keyed by a perceptual hash of the page image.
+
+    Entries are grouped by scope (model and prompt), so a prompt change never
+    returns stale text. A lookup first tries the exact hash and then the
+    closest stored hash within ``max_distance`` bits. The directory is
+    trimmed to ``max_disk_bytes`` by least recent use.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = os.getenv("OCR_CACHE_DIR", "cache/ocr"),
+        max_disk_bytes: int = int(os.getenv("OCR_CACHE_DISK_BYTES", str(64 * 1024 * 1024))),
+        max_distance: int = OCR_CACHE_MAX_DISTANCE
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_distance = max_distance
+        self._index: Dict[str, Dict[int, str]] = {}  # scope -> {hash value: hex}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_scope(model_name: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model_name}:{prompt}".encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, scope: str, page_hash: str) -> Path:
+        return self.cache_dir / scope / f"{page_hash}.txt"
+
+    def _scope_index(self, scope: str) -> Dict[int, str]:
+        # Called with the lock held; reads the directory once per scope
+        index = self._index.get(scope)
+        if index is None:
+            index = {}
+            for path in (self.cache_dir / scope).glob("*.txt"):
+                try:
+                    index[int(path.stem, 16)] = path.stem
+                except ValueError:
+                    continue
+            self._index[scope] = index
+        return index
+
+    def _nearest(self, scope: str, page_hash: str) -> Optional[str]:
+        value = int(page_hash, 16)
+        with self._lock:
+            index = self._scope_index(scope)
+            if value in index:
+                return index[value]
+            best, best_distance = None, self.max_distance + 1
+            for stored, stored_hex in index.items():
+                distance = (stored ^ value).bit_count()
+                if distance < best_distance:
+                    best, best_distance = stored_hex, distance
+            return best
+
+    def get(self, page_hash: str, scope: str) -> Optional[str]:
+        """Cached text for this page (or a near-identical one), or None."""
+        match = self._nearest(scope, page_hash)
+        if match is not None:
+            path = self._path(scope, match)
+            try:
+                text = path.read_text(encoding="utf-8")
+                os.utime(path)  # Mark as recently used for eviction
+            except OSError:
+                with self._lock:
+                    self._scope_index(scope).pop(int(match, 16), None)
+            else:
+                with self._lock:
+                    self.hits += 1
+                    if match != page_hash:
+                        self.near_hits += 1
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, page_hash: str, scope: str, text: str):
+        path = self._path(scope, page_hash)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write OCR cache entry {page_hash}: {e}")
+            return
+
+        with self._lock:
+            self._scope_index(scope)[int(page_hash, 16)] = page_hash
+        self._trim_disk()
+
+    def _trim_disk(self):
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+            with self._lock:
+                index = self._index.get(path.parent.name)
+                if index is not None:
+                    index.pop(int(path.stem, 16), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_llm_calls": self.hits,
+                "entries": sum(len(index) for index in self._index.values())
+            }
+
+
+ocr_cache = OCRCache()
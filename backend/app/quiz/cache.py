@@ -0,0 +1,131 @@
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import unicodedata
+from typing import Optional
+from .. import models
+from ..database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+QUIZ_CACHE_MAX_ENTRIES = int(os.getenv("QUIZ_CACHE_MAX_ENTRIES", "5000"))
+
+
+class QuizCache:
+    """
+    Content-addressed cache of generated questions, one entry per section.
+
+    Entries live in the ``quiz_cache`` table so every worker shares them. The
+    key is a hash of the normalized section text plus everything that changes
+    the output (question count, model and temperature), so a revised document
+    only misses on the sections that actually changed.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_entries: int = QUIZ_CACHE_MAX_ENTRIES):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize unicode and collapse whitespace so cosmetic changes still hit."""
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    def make_key(self, context: str, N: int, model_name: str, temperature: float) -> str:
+        payload = json.dumps([self.normalize(context), N, model_name, temperature])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return cached questions for ``key`` or None, updating the counters."""
+        db = self.session_factory()
+        try:
+            entry = db.query(models.QuizCacheEntry).filter(
+                models.QuizCacheEntry.cache_key == key
+            ).first()
+            if entry is None:
+                self._count(hit=False)
+                return None
+
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_used_at = func.now()
+            questions = entry.questions
+            db.commit()
+            self._count(hit=True)
+            return questions
+        finally:
+            db.close()
+
+    def put(self, key: str, questions: dict, model_name: str):
+        """Store questions for ``key`` and evict the least recently used overflow."""
+        db = self.session_factory()
+        try:
+            db.add(models.QuizCacheEntry(
+                cache_key=key,
+                questions=questions,
+                model_name=model_name,
+                hit_count=0
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker cached the same section first
+                db.rollback()
+                return
+            self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        total = db.query(func.count(models.QuizCacheEntry.id)).scalar()
+        overflow = total - self.max_entries
+        if overflow <= 0:
+            return
+
+        stale_ids = [row.id for row in db.query(models.QuizCacheEntry.id).order_by(
+            models.QuizCacheEntry.last_used_at.asc(),
+            models.QuizCacheEntry.id.asc()
+        ).limit(overflow)]
+        db.query(models.QuizCacheEntry).filter(
+            models.QuizCacheEntry.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+        db.commit()
+        logger.info(f"Evicted {len(stale_ids)} quiz cache entries")
+
+    async def aget(self, key: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, questions: dict, model_name: str):
+        await asyncio.to_thread(self.put, key, questions, model_name)
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus the shared table size."""
+        db = self.session_factory()
+        try:
+            entries = db.query(func.count(models.QuizCacheEntry.id)).scalar()
+            total_hits = db.query(func.coalesce(func.sum(models.QuizCacheEntry.hit_count), 0)).scalar()
+        finally:
+            db.close()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "total_hits": total_hits
+        }
@@ -0,0 +1,407 @@
+from contextlib import aclosing
+import asyncio
+import logging
+import os
+import socket
+import time
+import traceback
+from typing import AsyncIterator, List, Optional
+from .. import models
+from ..database import SessionLocal, engine
+from ..document_parser import DocumentParserFactory, DocumentSection
+from .cache import QuizCache
+from .quiz_generator import QuizGenerator
+
+logger = logging.getLogger(__name__)
+
+QUIZ_JOB_CONCURRENCY = int(os.getenv("QUIZ_JOB_CONCURRENCY", "4"))  # Sections in flight per worker
+MAX_JOB_SECTIONS = int(os.getenv("MAX_JOB_SECTIONS", "200"))
+QUIZ_JOB_POLL_INTERVAL = float(os.getenv("QUIZ_JOB_POLL_INTERVAL", "2"))
+QUIZ_JOB_HEARTBEAT_INTERVAL = float(os.getenv("QUIZ_JOB_HEARTBEAT_INTERVAL", "10"))
+QUIZ_JOB_STALE_AFTER = float(os.getenv("QUIZ_JOB_STALE_AFTER", "60"))  # Seconds without heartbeat
+QUIZ_JOB_MAX_ATTEMPTS = int(os.getenv("QUIZ_JOB_MAX_ATTEMPTS", "3"))
+
+
+def enqueue_quiz_job(db, user_id: int, filename: str, file_path: str, questions_per_section: int) -> models.QuizJob:
+    """
+    Add a quiz generation job to the queue and return it.
+    """
+    job = models.QuizJob(
+        user_id=user_id,
+        status="queued",
+        filename=filename,
+        file_path=file_path,
+        questions_per_section=questions_per_section,
+        attempts=0
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def remove_job_input(file_path: Optional[str]):
+    """
+    Delete a job's stored document once no quiz will be downloaded from it.
+    """
+    if not file_path:
+        return
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove quiz job input {file_path}: {e}")
+
+
+def requeue_stale_jobs(session_factory=SessionLocal, stale_after: float = QUIZ_JOB_STALE_AFTER) -> int:
+    """
+    Put running jobs whose worker stopped heartbeating back on the queue.
+
+    This is what lets jobs survive a worker crash or restart. Jobs that already
+    used up QUIZ_JOB_MAX_ATTEMPTS are marked failed instead.
+    """
+    cutoff = time.time() - stale_after
+    db = session_factory()
+    try:
+        stale = models.QuizJob.status == "running"
+        heartbeat_lost = (models.QuizJob.heartbeat_at == None) | (models.QuizJob.heartbeat_at < cutoff)  # noqa: E711
+
+        exhausted = (stale, heartbeat_lost, models.QuizJob.attempts >= QUIZ_JOB_MAX_ATTEMPTS)
+        failed_inputs = [row.file_path for row in db.query(models.QuizJob.file_path).filter(*exhausted)]
+        failed = db.query(models.QuizJob).filter(*exhausted).update({
+            models.QuizJob.status: "failed",
+            models.QuizJob.error: "Job was interrupted too many times"
+        }, synchronize_session=False)
+        requeued = db.query(models.QuizJob).filter(stale, heartbeat_lost).update({
+            models.QuizJob.status: "queued",
+            models.QuizJob.worker_id: None
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    for file_path in failed_inputs:
+        remove_job_input(file_path)
+    if requeued or failed:
+        logger.info(f"Requeued {requeued} and failed {failed} stale quiz jobs")
+    return requeued
+
+
+def job_status(job: models.QuizJob) -> dict:
+    """
+    Public view of a job, with per-section progress but without the questions.
+    """
+    sections = [
+        {
+            "section_index": entry["section_index"],
+            "page_number": entry.get("page_number"),
+            "status": entry["status"],
+            "questions": len(entry.get("questions") or {})
+        } for entry in (job.progress or [])
+    ]
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "total_sections": job.total_sections or 0,
+        "completed_sections": job.completed_sections or 0,
+        "sections": sections,
+        "quiz_id": job.quiz_id,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+
+class QuizJobWorker:
+    """
+    Processes quiz jobs from the ``quiz_jobs`` table.
+
+    Any number of workers, in the API process or launched separately with
+    ``python -m app.quiz.jobs``, can share the queue: a job is claimed with a
+    conditional UPDATE so only one worker gets it. Sections are generated
+    while the rest of the document is still being parsed. Finished sections
+    are written to the job row as they complete, so a job resumed after a
+    restart only regenerates the sections that were still missing; one
+    interrupted before parsing finished parses again, with its finished
+    sections answered from the quiz cache.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        session_factory=SessionLocal,
+        concurrency: int = QUIZ_JOB_CONCURRENCY,
+        poll_interval: float = QUIZ_JOB_POLL_INTERVAL,
+        cache: Optional[QuizCache] = None
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.cache = cache or QuizCache(session_factory=session_factory)
+
+    async def run(self, stop_event: asyncio.Event):
+        """
+        Claim and process jobs until ``stop_event`` is set.
+        """
+        logger.info(f"Quiz job worker {self.worker_id} started")
+        last_requeue = 0.0
+
+        while not stop_event.is_set():
+            try:
+                if time.time() - last_requeue > QUIZ_JOB_STALE_AFTER / 2:
+                    await asyncio.to_thread(requeue_stale_jobs, self.session_factory)
+                    last_requeue = time.time()
+
+                job_id = await asyncio.to_thread(self.claim_next_job)
+                if job_id is not None:
+                    await self.process(job_id)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        logger.info(f"Quiz job worker {self.worker_id} stopped")
+
+    def claim_next_job(self) -> Optional[int]:
+        """
+        Atomically move the oldest queued job to running and return its id.
+        """
+        db = self.session_factory()
+        try:
+            for _ in range(5):
+                candidate = db.query(models.QuizJob.id).filter(
+                    models.QuizJob.status == "queued"
+                ).order_by(models.QuizJob.created_at.asc(), models.QuizJob.id.asc()).first()
+                if candidate is None:
+                    return None
+
+                claimed = db.query(models.QuizJob).filter(
+                    models.QuizJob.id == candidate.id,
+                    models.QuizJob.status == "queued"
+                ).update({
+                    models.QuizJob.status: "running",
+                    models.QuizJob.worker_id: self.worker_id,
+                    models.QuizJob.heartbeat_at: time.time(),
+                    models.QuizJob.attempts: models.QuizJob.attempts + 1
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    return candidate.id
+            return None  # Lost every race, try again on the next poll
+        finally:
+            db.close()
+
+    async def process(self, job_id: int):
+        """
+        Parse the job's document and generate every pending section.
+        """
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            job = await asyncio.to_thread(self._load_job, job_id)
+            if job is None:
+                logger.warning(f"Quiz job {job_id} no longer exists, skipping")
+                return
+            quiz_generator = QuizGenerator(cache=self.cache)
+            N = min(job.questions_per_section or 3, 5)  # Limit questions per section
+
+            if job.progress and job.total_sections:
+                # Parsed in full before the interruption; finish what is left
+                progress = job.progress
+                pending = [entry for entry in progress if entry["status"] != "done"]
+                results = quiz_generator.iterQuizzes(
+                    [entry["content"] for entry in pending],
+                    N=N,
+                    concurrency=self.concurrency
+                )
+                parsed = None
+            else:
+                progress = []
+                pending = progress
+                parsed = asyncio.Event()
+                results = quiz_generator.iterQuizzesFromStream(
+                    self._plan_sections(job, progress, parsed),
+                    N=N,
+                    concurrency=self.concurrency
+                )
+
+            async with aclosing(results):
+                async for index, *_, questions in results:
+                    entry = pending[index]
+                    entry["status"] = "done" if questions else "failed"
+                    entry["questions"] = questions
+                    total = len(progress) if parsed is None or parsed.is_set() else None
+                    await asyncio.to_thread(self._save_progress, job_id, progress, total)
+
+            await asyncio.to_thread(self._finish_job, job_id, progress)
+
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so the next worker resumes it
+            await asyncio.shield(asyncio.to_thread(self._release_job, job_id))
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            await asyncio.to_thread(self._fail_job, job_id, str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(QUIZ_JOB_HEARTBEAT_INTERVAL)
+            try:
+                await asyncio.to_thread(self._update_job, job_id, heartbeat_at=time.time())
+            except Exception:
+                traceback.print_exc()
+
+    def _load_job(self, job_id: int) -> Optional[models.QuizJob]:
+        db = self.session_factory()
+        try:
+            job = db.query(models.QuizJob).filter(models.QuizJob.id == job_id).first()
+            if job is not None:
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    async def _plan_sections(self, job: models.QuizJob, progress: List[dict],
+                             parsed: asyncio.Event) -> AsyncIterator[DocumentSection]:
+        """
+        Yield the document's sections as they are parsed.
+
+        A pending entry is appended to ``progress`` for each section, and
+        ``parsed`` is set once the whole document was parsed. total_sections
+        is only stored from then on, which is what marks the plan complete.
+        """
+        parser = DocumentParserFactory.create_parser(job.file_path, max_section_length=1000)
+        async with aclosing(parser.aiter_sections(job.file_path)) as sections:
+            async for section in sections:
+                if len(progress) >= MAX_JOB_SECTIONS:
+                    raise ValueError(f"Document contains too many sections (max {MAX_JOB_SECTIONS})")
+                progress.append({
+                    "section_index": len(progress),
+                    "page_number": section.page_number,
+                    "content": section.content,
+                    "status": "pending",
+                    "questions": None
+                })
+                yield section
+
+        if not progress:
+            raise ValueError("No text could be extracted from the document")
+        parsed.set()
+
+    def _save_progress(self, job_id: int, progress: List[dict], total_sections: Optional[int] = None):
+        completed = sum(1 for entry in progress if entry["status"] != "pending")
+        values = {"total_sections": total_sections} if total_sections is not None else {}
+        # Assign a fresh list so SQLAlchemy sees the JSON column as changed
+        self._update_job(
+            job_id,
+            progress=[dict(entry) for entry in progress],
+            completed_sections=completed,
+            heartbeat_at=time.time(),
+            **values
+        )
+
+    def _finish_job(self, job_id: int, progress: List[dict]):
+        quiz_results = [entry["questions"] for entry in progress if entry["questions"]]
+        if not quiz_results:
+            self._fail_job(job_id, "No questions could be generated from the document")
+            return
+
+        db = self.session_factory()
+        try:
+            # Complete the job only while this worker still owns it; a job
+            # requeued as stale and claimed elsewhere must not get a second quiz.
+            # The conditional update holds the row until the commit below.
+            owned = db.query(models.QuizJob).filter(
+                models.QuizJob.id == job_id,
+                models.QuizJob.worker_id == self.worker_id,
+                models.QuizJob.status == "running"
+            ).update({models.QuizJob.status: "completed"}, synchronize_session=False)
+            if not owned:
+                db.rollback()
+                logger.warning(f"Quiz job {job_id} was taken over by another worker, not saving its quiz")
+                return
+
+            job = db.query(models.QuizJob).filter(models.QuizJob.id == job_id).first()
+            quiz = models.Quiz(
+                title=job.filename.split('.')[0],  # Use filename without extension as title
+                content=quiz_results,
+                user_id=job.user_id,
+                filename=job.filename,
+                file_path=job.file_path  # Keep file for download
+            )
+            db.add(quiz)
+            db.flush()
+            job.quiz_id = quiz.id
+            job.progress = [dict(entry) for entry in progress]
+            job.total_sections = len(progress)
+            job.completed_sections = len(progress)
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail_job(self, job_id: int, error: str):
+        if self._update_job(job_id, status="failed", error=error):
+            # A failed job has no quiz to download its document from
+            db = self.session_factory()
+            try:
+                job = db.query(models.QuizJob.file_path).filter(models.QuizJob.id == job_id).first()
+            finally:
+                db.close()
+            remove_job_input(job.file_path if job else None)
+
+    def _release_job(self, job_id: int):
+        self._update_job(job_id, status="queued", worker_id=None)
+
+    def _update_job(self, job_id: int, **values) -> int:
+        db = self.session_factory()
+        try:
+            updated = db.query(models.QuizJob).filter(
+                models.QuizJob.id == job_id,
+                models.QuizJob.worker_id == self.worker_id
+            ).update(
+                {getattr(models.QuizJob, name): value for name, value in values.items()},
+                synchronize_session=False
+            )
+            db.commit()
+            return updated
+        finally:
+            db.close()
+
+
+def start_quiz_workers(count: int, stop_event: asyncio.Event) -> List[asyncio.Task]:
+    """
+    Start ``count`` in-process workers on the running event loop.
+    """
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    return [
+        asyncio.create_task(QuizJobWorker(worker_id=f"{base_id}:{n}").run(stop_event))
+        for n in range(count)
+    ]
+
+
+async def main(count: int = 1):
+    stop_event = asyncio.Event()
+    await asyncio.to_thread(requeue_stale_jobs)
+    workers = start_quiz_workers(count, stop_event)
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        stop_event.set()
+
+
+if __name__ == "__main__":
+    # Run dedicated workers with: python -m app.quiz.jobs [count]
+    import sys
+    models.Base.metadata.create_all(bind=engine)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
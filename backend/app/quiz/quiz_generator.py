@@ -1,6 +1,10 @@
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from pydantic import BaseModel, Field  # Change this import
+from pydantic import BaseModel, Field, ValidationError  # Change this import
+from typing import List
+import asyncio
+import threading
+from contextlib import aclosing
 import time
 import os
 import json
@@ -17,18 +21,37 @@ class Quiz(BaseModel):
     answer: str = Field(description="answer to the generated question only allowed values are one of 'opt1, opt2, opt3, opt4'.")
     explanation: str = Field(description="This is the explanation for the answer to the question.")
 
+
+class QuizList(BaseModel):
+    questions: List[Quiz] = Field(description="List of generated quiz questions.")
+
         
 
 class QuizGenerator(LLMConfig):
+
+    # Chains keyed by id() of the registry client they wrap
+    _chains = {}
+    _chains_lock = threading.Lock()
    
     def __init__(
         self,
         model_name: str = "gemini-2.5-flash",
         temperature: float = 0.2,
-        max_tokens: int = 1024
+        max_tokens: int = 4096,
+        batched: bool = True,
+        max_batch_rounds: int = 3,
+        cache=None
     ):
         """
         Initialize Quiz Generator with LLM configuration
+
+        Args:
+            batched (bool): Ask for all N questions of a section in one call
+                instead of one call per question
+            max_batch_rounds (int): How many calls a batched section may use
+                to top up missing or invalid questions
+            cache (QuizCache): Optional section-level cache consulted by
+                generateSection before calling the LLM
         """
         super().__init__(
             model_name=model_name,
@@ -36,6 +59,34 @@ class QuizGenerator(LLMConfig):
             max_tokens=max_tokens
         )
         self.finalResult = {}
+        self.batched = batched
+        self.max_batch_rounds = max_batch_rounds
+        self.cache = cache
+
+        # Prompt, parsers and chains are built once per shared LLM client
+        self.parser, self.batch_parser, self.chain, self.batch_chain = self._sharedChains()
+
+    def _sharedChains(self):
+        with QuizGenerator._chains_lock:
+            entry = QuizGenerator._chains.get(id(self.llm))
+            # Compare the client itself so a recycled id never matches
+            if entry is None or entry[0] is not self.llm:
+                parser = JsonOutputParser(pydantic_object=Quiz)
+                batch_parser = JsonOutputParser(pydantic_object=QuizList)
+                entry = (self.llm, parser, batch_parser,
+                         self._buildChain(parser), self._buildChain(batch_parser))
+                QuizGenerator._chains[id(self.llm)] = entry
+        return entry[1:]
+
+    def _buildChain(self, parser):
+        prompt = PromptTemplate(
+            template=(
+                "Answer the user query.\n{format_instructions}\n{query}\n"
+            ),
+            input_variables=["query"],
+            partial_variables={"format_instructions": parser.get_format_instructions()},
+        )
+        return prompt | self.llm | parser
     
     async def generateQuiz(self, context, current_Questions=None, N=3):
         """
@@ -44,7 +95,53 @@ class QuizGenerator(LLMConfig):
         if current_Questions is None:
             current_Questions = {}
 
-        parser = JsonOutputParser(pydantic_object=Quiz)
+        if self.batched:
+            self.finalResult = await self._generateBatched(context, current_Questions, N)
+        else:
+            self.finalResult = await self._generateSequential(context, current_Questions, N)
+        return self.finalResult
+
+    async def _generateBatched(self, context, current_Questions, N):
+        """
+        Request all missing questions as one JSON array per LLM call.
+
+        Each returned item is validated locally; only the missing or invalid
+        ones are asked for again in the next round.
+        """
+        rounds = 0
+
+        while len(current_Questions) < N and rounds < self.max_batch_rounds:
+            rounds += 1
+            missing = N - len(current_Questions)
+            try:
+                previous_questions = [q['question'] for q in current_Questions.values()]
+                prev_q_text = "\n".join(previous_questions)
+                q = rf'''Generate exactly {missing} unique multiple choice questions from the following context. context: {context}.
+Do NOT repeat any of these questions: {prev_q_text if prev_q_text else "None"}.
+Return them under the "questions" key. The following should be the structure for each question:
+{{'question': question, 'opt1': option 1, 'opt2': option 2, 'opt3': option 3, 'opt4': option 4, 'answer': correct option, 'explanation': explanation}}
+Every question should be unique and have all four options along with the answer and explanation.
+'''
+                r = await self.batch_chain.ainvoke({"query": q})
+
+                items = r.get('questions', []) if isinstance(r, dict) else r
+                for item in items or []:
+                    if len(current_Questions) >= N:
+                        break
+                    if not self.itemCheck(item) or item['question'] in previous_questions:
+                        continue
+                    previous_questions.append(item['question'])
+                    current_Questions['question' + str(len(current_Questions) + 1)] = dict(item)
+
+            except Exception as e:
+                traceback.print_exc()
+
+        return current_Questions
+
+    async def _generateSequential(self, context, current_Questions, N):
+        """
+        Request one question per LLM call (the original, unbatched mode).
+        """
         max_attempts = N * 5  # Try at most 5 times per question
         attempts = 0
 
@@ -53,21 +150,13 @@ class QuizGenerator(LLMConfig):
             try:
                 previous_questions = [q['question'] for q in current_Questions.values()]
                 prev_q_text = "\n".join(previous_questions)
-                prompt = PromptTemplate(
-                    template=(
-                        "Answer the user query.\n{format_instructions}\n{query}\n"
-                    ),
-                    input_variables=["query"],
-                    partial_variables={"format_instructions": parser.get_format_instructions()},
-                )
-                chain = prompt | self.llm | parser  # <-- Define chain here
                 q = rf'''Generate a unique question from the following context. context: {context}.
 Do NOT repeat any of these questions: {prev_q_text if prev_q_text else "None"}.
 The following should be the structure for each question:
 {{'question': question, 'opt1': option 1, 'opt2': option 2, 'opt3': option 3, 'opt4': option 4, 'answer': correct option}}
 Every question should be unique and have all four options along with the answer and explanation.
 '''
-                r = chain.invoke({"query": q})
+                r = await self.chain.ainvoke({"query": q})
 
                 # Check for duplicate question
                 if r['question'] in previous_questions:
@@ -81,10 +170,164 @@ Every question should be unique and have all four options along with the answer
                 traceback.print_exc()
                 # Just try again, don't recurse
 
-        self.finalResult = current_Questions
-        return self.finalResult
+        return current_Questions
+
+    async def generateSection(self, context, N=3):
+        """
+        Generate questions for one section, going through the cache if set.
+
+        Only complete results (all N questions) are written to the cache.
+        """
+        if self.cache is None:
+            return await self.generateQuiz(context=context, N=N)
+
+        key = self.cache.make_key(context, N, self.model_name, self.temperature)
+        try:
+            cached = await self.cache.aget(key)
+        except Exception:
+            traceback.print_exc()
+            cached = None
+        if cached is not None:
+            return cached
+
+        questions = await self.generateQuiz(context=context, N=N)
+        if len(questions) >= N:
+            try:
+                await self.cache.aput(key, questions, self.model_name)
+            except Exception:
+                traceback.print_exc()
+        return questions
+
+    async def iterQuizzes(self, contexts, N=3, concurrency=4, timeout=None):
+        """
+        Generate quiz questions for several contexts concurrently.
+
+        Yields ``(index, questions)`` pairs as soon as each context finishes,
+        with at most ``concurrency`` contexts in flight. Contexts that fail or
+        are still running after ``timeout`` seconds are not yielded.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(index, context):
+            async with semaphore:
+                return index, await self.generateSection(context, N=N)
+
+        tasks = [asyncio.create_task(run(index, context)) for index, context in enumerate(contexts)]
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        try:
+            pending = set(tasks)
+            while pending:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=tasks.index):
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    yield task.result()
+        finally:
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+    async def iterQuizzesFromStream(self, sections, N=3, concurrency=4, timeout=None):
+        """
+        Generate questions for sections while they are still being parsed.
+
+        ``sections`` is an async iterator of DocumentSection (for example
+        DocumentParser.aiter_sections). A new section is only pulled once one
+        of the ``concurrency`` generation slots is free, so together with the
+        parser's bounded queue memory stays flat regardless of document size.
+
+        Yields ``(index, section, questions)`` in completion order; questions
+        is None when that section failed. Parsing errors are re-raised. Work
+        still running after ``timeout`` seconds is cancelled.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        results = asyncio.Queue()
+        tasks = []
+        finished = object()
+
+        async def run(index, section):
+            try:
+                questions = await self.generateSection(section.content, N=N)
+            except Exception:
+                traceback.print_exc()
+                questions = None
+            finally:
+                semaphore.release()
+            await results.put((index, section, questions))
+
+        async def feed():
+            try:
+                index = 0
+                async for section in sections:
+                    await semaphore.acquire()
+                    tasks.append(asyncio.create_task(run(index, section)))
+                    index += 1
+                await asyncio.gather(*tasks)
+                await results.put(finished)
+            except Exception as e:
+                await results.put(e)
+
+        feeder = asyncio.create_task(feed())
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(results.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            unfinished = [task for task in [feeder, *tasks] if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+            if hasattr(sections, "aclose"):
+                await sections.aclose()
+
+    async def generateQuizzes(self, contexts, N=3, concurrency=4, timeout=None):
+        """
+        Generate quiz questions for several contexts concurrently.
+
+        At most ``concurrency`` contexts are in flight at once. Results are
+        returned in the same order as ``contexts``; an entry is None when that
+        context failed or did not finish within ``timeout`` seconds.
+        """
+        results = [None] * len(contexts)
+        async with aclosing(self.iterQuizzes(contexts, N, concurrency, timeout)) as completed:
+            async for index, questions in completed:
+                results[index] = questions
+        return results
             
     def outputCheck(self,r):
         if r['answer'] not in ['opt1', 'opt2', 'opt3', 'opt4']:
             return False
-        return True
\ No newline at end of file
+        return True
+
+    def itemCheck(self, r):
+        """Validate one item of a batched response against the Quiz schema."""
+        if not isinstance(r, dict):
+            return False
+        try:
+            Quiz.model_validate(r)
+        except ValidationError:
+            return False
+        return self.outputCheck(r)
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+The scripts are meant to be run from the ``backend`` directory, e.g.
+``python -m benchmarks.event_loop_responsiveness``. They never talk to the
+real Gemini API: LLM calls are answered by a local stand-in with a fixed
+latency so timings only reflect our own code.
+"""
+import asyncio
+import json
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+from itertools import count
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+UPLOADS_DIR = BACKEND_DIR / "app" / "uploads"
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+os.environ.setdefault(
+    "DATABASE_URI", f"sqlite:///{Path(tempfile.gettempdir()) / 'studentbuddy_benchmark.db'}"
+)
+
+_question_ids = count(1)
+
+
+def _fake_question():
+    n = next(_question_ids)
+    return {
+        "question": f"Benchmark question {n}?",
+        "opt1": "a", "opt2": "b", "opt3": "c", "opt4": "d",
+        "answer": "opt1",
+        "explanation": "Stand-in answer.",
+    }
+
+
+def _fake_reply(prompt_value):
+    from langchain_core.messages import AIMessage
+
+    text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+    match = re.search(r"Generate exactly (\d+)", text)
+    if match:
+        questions = [_fake_question() for _ in range(int(match.group(1)))]
+        return AIMessage(content=json.dumps({"questions": questions}))
+    if "Answer the user query" in text:
+        return AIMessage(content=json.dumps(_fake_question()))
+    return AIMessage(content="Stand-in answer from the benchmark LLM.")
+
+
+def fake_llm(latency: float = 1.0, blocking: bool = False):
+    """
+    Build a stand-in chat model with a fixed round-trip latency.
+
+    With ``blocking=True`` the async path sleeps synchronously, which is what
+    a plain ``llm.invoke`` inside an ``async def`` handler does to the loop.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    def invoke(prompt_value):
+        time.sleep(latency)
+        return _fake_reply(prompt_value)
+
+    async def ainvoke(prompt_value):
+        if blocking:
+            time.sleep(latency)
+        else:
+            await asyncio.sleep(latency)
+        return _fake_reply(prompt_value)
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def install_fake_llm(latency: float = 1.0, blocking: bool = False):
+    """Make every LLMConfig in the app use the stand-in model."""
+    from app.llm import config
+
+    config.ChatGoogleGenerativeAI = lambda *args, **kwargs: fake_llm(latency, blocking)
+    config.llm_registry.clear()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (Linux reports KB)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def sample_pdfs():
+    """Distinct sample PDFs from app/uploads (duplicate uploads are skipped)."""
+    seen = set()
+    pdfs = []
+    for path in sorted(UPLOADS_DIR.glob("*.pdf")):
+        size = path.stat().st_size
+        if size in seen:
+            continue
+        seen.add(size)
+        pdfs.append(path)
+    return pdfs
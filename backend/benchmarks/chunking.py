@@ -0,0 +1,110 @@
+"""
+Microbenchmark: TextChunker against the previous _split_into_sections.
+
+Runs both splitters on synthetic text of growing size (to show the scaling)
+and on the text of the sample PDFs (to compare section counts and sizes).
+
+    cd backend && python -m benchmarks.chunking [--max-mb 8]
+"""
+import argparse
+import random
+import time
+
+from benchmarks._support import sample_pdfs
+
+
+def legacy_split(text, max_section_length=1000):
+    """The pre-change DocumentParser._split_into_sections."""
+    if not text.strip():
+        return []
+
+    sections = []
+    current_section = []
+    current_length = 0
+
+    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+
+    for para in paragraphs:
+        if len(para) > max_section_length:
+            sentences = [s.strip() for s in para.split('. ') if s.strip()]
+            for sentence in sentences:
+                if current_length + len(sentence) > max_section_length and current_section:
+                    sections.append(' '.join(current_section))
+                    current_section = []
+                    current_length = 0
+
+                current_section.append(sentence)
+                current_length += len(sentence)
+        else:
+            if current_length + len(para) > max_section_length and current_section:
+                sections.append(' '.join(current_section))
+                current_section = []
+                current_length = 0
+
+            current_section.append(para)
+            current_length += len(para)
+
+    if current_section:
+        sections.append(' '.join(current_section))
+
+    return sections
+
+
+def synthetic_text(size_bytes, seed=0):
+    rng = random.Random(seed)
+    words = "the quiz model reads each section of a document and asks questions about it".split()
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        sentences = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(5, 30))).capitalize() + "."
+            for _ in range(rng.randint(1, 12))
+        ]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def timed(fn, text):
+    started = time.perf_counter()
+    result = fn(text)
+    return time.perf_counter() - started, result
+
+
+def summary(sections, estimate_tokens):
+    tokens = [estimate_tokens(section) for section in sections] or [0]
+    return f"{len(sections):>6} sections, tokens max {max(tokens):>4} / min {min(tokens):>4}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--max-mb", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    from app.chunker import estimate_tokens
+    from app.document_parser import PDFParser
+
+    parser = PDFParser(max_section_length=1000)
+
+    print(f"{'size':>8} {'legacy':>9} {'chunker':>9} {'chunker MB/s':>13}")
+    size_mb = 1
+    while size_mb <= args.max_mb:
+        text = synthetic_text(size_mb * 1024 * 1024)
+        before, _ = timed(legacy_split, text)
+        after, _ = timed(parser._split_into_sections, text)
+        print(f"{size_mb:>6}MB {before:>8.3f}s {after:>8.3f}s {size_mb / after:>13.1f}")
+        size_mb *= 2
+
+    print()
+    for path in sample_pdfs():
+        pages = [page.text for page in parser.iter_pages(str(path))]
+        legacy = [section for text in pages for section in legacy_split(text)]
+        chunked = [section for text in pages for section in parser._split_into_sections(text)]
+        print(path.name[:40])
+        print(f"  legacy  {summary(legacy, estimate_tokens)}")
+        print(f"  chunker {summary(chunked, estimate_tokens)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Compare the streaming DocxParser with the previous python-docx based parser.
+
+Generates DOCX files of growing length (paragraphs plus a table per page),
+then parses each one in a fresh subprocess per parser so peak RSS is
+measured separately; "growth" is the peak above the RSS after imports.
+
+The streaming parser keeps more text because the old one read only
+``doc.paragraphs`` and skipped tables. The content check rebuilds, with
+python-docx, the blocks the streaming reader should produce (body
+paragraphs and table rows in document order) and fails if they differ,
+then reports how much of the extra text is table rows. Sections also
+differ because they are chunked with TextChunker.
+
+python-docx is only needed here, not by the app:
+
+    pip install python-docx
+    cd backend && python -m benchmarks.docx_parsing [--pages 50 200 800]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._support import BACKEND_DIR, peak_rss_mb
+
+PARAGRAPHS_PER_PAGE = 12
+
+
+def legacy_parse(file_path, max_section_length=1000):
+    """The pre-change DocxParser.parse (python-docx, paragraphs only)."""
+    import docx
+
+    sections = []
+    doc = docx.Document(file_path)
+    current_section = []
+    current_length = 0
+
+    for para in doc.paragraphs:
+        text = para.text.strip()
+        if not text:
+            continue
+        if current_length + len(text) > max_section_length and current_section:
+            sections.append('\n'.join(current_section))
+            current_section = []
+            current_length = 0
+        current_section.append(text)
+        current_length += len(text)
+
+    if current_section:
+        sections.append('\n'.join(current_section))
+    return sections
+
+
+def python_docx_blocks(file_path):
+    """
+    ``(kind, text)`` of every block iter_docx_blocks should yield, read with python-docx.
+    """
+    import docx
+    from docx.oxml.ns import qn
+    from docx.table import Table, _Cell
+    from docx.text.paragraph import Paragraph
+
+    doc = docx.Document(file_path)
+    blocks = []
+    for child in doc.element.body.iterchildren():
+        if child.tag == qn("w:p"):
+            text = Paragraph(child, doc).text.strip()
+            if text:
+                blocks.append(("paragraph", text))
+        elif child.tag == qn("w:tbl"):
+            table = Table(child, doc)
+            for row in table.rows:
+                cells = [
+                    " ".join(p.text.strip() for p in _Cell(tc, table).paragraphs if p.text.strip())
+                    for tc in row._tr.tc_lst
+                ]
+                text = " | ".join(cell for cell in cells if cell)
+                if text:
+                    blocks.append(("table row", text))
+    return blocks
+
+
+def check_content(file_path):
+    from app.document_parser import iter_docx_blocks
+
+    expected = python_docx_blocks(file_path)
+    streamed = list(iter_docx_blocks(str(file_path)))
+    if streamed != [text for _, text in expected]:
+        raise SystemExit(f"iter_docx_blocks output differs from python-docx for {file_path}")
+    return {
+        kind: (sum(1 for k, _ in expected if k == kind), sum(len(t) for k, t in expected if k == kind))
+        for kind in ("paragraph", "table row")
+    }
+
+
+def streaming_parse(file_path):
+    from app.document_parser import DocxParser
+    return [section.content for section in DocxParser(max_section_length=1000).iter_sections(file_path)]
+
+
+def make_docx(path, pages):
+    import docx
+
+    doc = docx.Document()
+    sentence = "Each page of the generated document talks about study notes and quiz questions. "
+    for page in range(pages):
+        doc.add_heading(f"Chapter {page + 1}", level=2)
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            doc.add_paragraph(sentence * 3)
+        table = doc.add_table(rows=4, cols=3)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = f"term {page}"
+    doc.save(path)
+
+
+def run_child(parser_name, file_path):
+    # Import both parsers' modules so the baseline RSS is the same for each
+    import docx  # noqa: F401
+    import app.document_parser  # noqa: F401
+
+    parse = legacy_parse if parser_name == "python-docx" else streaming_parse
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    sections = parse(file_path)
+    return {
+        "seconds": time.perf_counter() - started,
+        "sections": len(sections),
+        "chars": sum(len(section) for section in sections),
+        "peak_rss_mb": peak_rss_mb(),
+        "growth_mb": peak_rss_mb() - baseline
+    }
+
+
+def measure(parser_name, file_path):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.docx_parsing", "--child", parser_name, str(file_path)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 800])
+    arg_parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return
+
+    print(f"{'pages':>5} {'parser':<12} {'time':>8} {'peak RSS':>9} {'growth':>8} {'sections':>8} {'chars':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for pages in args.pages:
+            path = Path(tmp_dir) / f"doc_{pages}.docx"
+            make_docx(path, pages)
+            for parser_name in ("python-docx", "streaming"):
+                result = measure(parser_name, path)
+                print(f"{pages:>5} {parser_name:<12} {result['seconds']:>7.3f}s {result['peak_rss_mb']:>7.1f}MB {result['growth_mb']:>6.1f}MB "
+                      f"{result['sections']:>8} {result['chars']:>9}")
+            content = check_content(path)
+            print(f"{'':>5} content matches python-docx: " + ", ".join(
+                f"{count} {kind}s ({chars} chars)" for kind, (count, chars) in content.items()
+            ))
+
+
+if __name__ == "__main__":
+    main()
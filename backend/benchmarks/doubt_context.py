@@ -0,0 +1,112 @@
+"""
+Prompt context for /api/solve-doubt: leading sections vs retrieval.
+
+Parses the sample syllabus in app/uploads into sections, spreads them over a
+100-page document and plants the answer to the question on page 80. The old
+behaviour sent the first five sections; select_pdf_context indexes the
+sections and packs the best matches under DOUBT_CONTEXT_TOKENS. Embeddings
+come from a stand-in bag-of-words backend with a fixed latency per call, so
+the ranking is lexical but the request pattern is the real one. The last
+rows use the offline hashing backend (EMBEDDING_BACKEND=hashing) instead.
+
+    cd backend && python -m benchmarks.doubt_context [--latency 0.08]
+"""
+import argparse
+import functools
+import hashlib
+import logging
+import math
+import os
+import tempfile
+import time
+
+from benchmarks._support import UPLOADS_DIR
+
+QUESTION = "How does Dijkstra's algorithm use a binary heap priority queue to find shortest paths?"
+FOLLOW_UP = "What is the running time of Dijkstra with a binary heap?"
+ANSWER = (
+    "Dijkstra's shortest path algorithm keeps tentative distances in a binary heap priority queue. "
+    "Each step extracts the closest unvisited vertex from the heap and relaxes its outgoing edges, "
+    "so with a binary heap the algorithm runs in O((V + E) log V) time."
+)
+DIMENSION = 768
+
+
+def bag_of_words(text):
+    vector = [0.0] * DIMENSION
+    for word in text.lower().split():
+        word = word.strip(".,;:()?'\"")
+        if len(word) > 2:
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % DIMENSION] += 1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def build_sections(pages, answer_page):
+    from app.document_parser import DocumentParserFactory, DocumentSection
+
+    source = UPLOADS_DIR / "R20_CSM_FINAL_SYLLABUS_6.0.pdf"
+    parsed = DocumentParserFactory.create_parser(str(source), max_section_length=1000).parse(str(source))
+    sections = []
+    for page in range(1, pages + 1):
+        if page == answer_page:
+            sections.append(DocumentSection(content=ANSWER, page_number=page))
+        for offset in range(3):
+            text = parsed[(page * 3 + offset) % len(parsed)].content
+            sections.append(DocumentSection(content=text, page_number=page))
+    return sections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--answer-page", type=int, default=80)
+    parser.add_argument("--latency", type=float, default=0.08, help="Seconds per embedding API call")
+    args = parser.parse_args()
+
+    store_dir = tempfile.mkdtemp()
+    os.environ["VECTOR_STORE_PATH"] = os.path.join(store_dir, "vectors.sqlite3")
+    os.environ["EMBEDDING_CACHE_DIR"] = os.path.join(store_dir, "embeddings")
+
+    from app import main as app_main
+    from app.chunker import estimate_tokens
+    from app.ContextRetrieval.context_retrieval import QdrantMemory
+    logging.getLogger("app.ContextRetrieval.context_retrieval").setLevel(logging.ERROR)
+
+    calls = []
+
+    class StandInMemory(QdrantMemory):
+        def _embed_batch(self, texts, task_type):
+            calls.append(len(texts))
+            time.sleep(args.latency)
+            return [bag_of_words(text) for text in texts]
+
+    sections = build_sections(args.pages, args.answer_page)
+    marker = f"Page {args.answer_page}:"
+
+    old_context = ""
+    for section in sections[:5]:
+        old_context += f"Page {section.page_number}: {section.content}\n\n"
+
+    print(f"{len(sections)} sections over {args.pages} pages, answer on page {args.answer_page}")
+    print(f"{'context':<22} {'chars':>7} {'tokens':>7} {'has answer':>11} {'time':>8} {'api calls':>10}")
+    print(f"{'first 5 sections':<22} {len(old_context):>7} {estimate_tokens(old_context):>7} "
+          f"{str(marker in old_context):>11} {'-':>8} {'-':>10}")
+
+    backends = (
+        ("api stand-in", StandInMemory),
+        ("hashing", functools.partial(QdrantMemory, embedding_backend="hashing"))
+    )
+    for backend, memory_class in backends:
+        app_main.QdrantMemory = memory_class
+        for turn, question in (("first turn", QUESTION), ("follow-up", FOLLOW_UP)):
+            calls.clear()
+            started = time.perf_counter()
+            context = app_main.select_pdf_context(question, sections, user_id=1, document_id="benchmark-document")
+            elapsed = time.perf_counter() - started
+            print(f"{backend + ', ' + turn:<22} {len(context):>7} {estimate_tokens(context):>7} "
+                  f"{str(marker in context):>11} {elapsed * 1000:>6.0f}ms {len(calls):>10}")
+
+
+if __name__ == "__main__":
+    main()
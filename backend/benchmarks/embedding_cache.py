@@ -0,0 +1,84 @@
+"""
+Cost of re-indexing course material with and without the embedding cache.
+
+A stand-in embedding backend (fixed latency per API call, deterministic
+vectors) replaces Gemini. The same sections are indexed by a first session
+(cold cache) and then by a second one (warm cache), the way two students
+uploading the same syllabus would. Also reports bytes per cached vector and
+how far float16 storage moves cosine scores.
+
+    cd backend && python -m benchmarks.embedding_cache [--texts 200]
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import tempfile
+import time
+
+from benchmarks import _support  # noqa: F401  (sets up sys.path and env)
+
+DIMENSION = 768
+
+
+def fake_vector(text: str):
+    rng = random.Random(text)
+    return [rng.gauss(0, 1) for _ in range(DIMENSION)]
+
+
+def cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    return dot / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.08, help="Seconds per embedding API call")
+    args = parser.parse_args()
+
+    logging.getLogger("app.ContextRetrieval.context_retrieval").setLevel(logging.ERROR)
+    from app.ContextRetrieval.context_retrieval import QdrantMemory
+    from app.ContextRetrieval.embedding_cache import EmbeddingCache, decode_vector, encode_vector
+
+    calls = []
+
+    class StandInMemory(QdrantMemory):
+        def _embed_batch(self, texts, task_type):
+            calls.append(len(texts))
+            time.sleep(args.latency)
+            return [fake_vector(text) for text in texts]
+
+    texts = [f"Section {i}: " + "photosynthesis converts light energy " * (10 + i % 20) for i in range(args.texts)]
+
+    print(f"{args.texts} sections, {args.latency * 1000:.0f}ms per API call")
+    print(f"{'run':<22} {'time':>8} {'api calls':>10} {'hit rate':>9}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = EmbeddingCache(cache_dir)
+        for run, session in (("no cache", None), ("cold cache", "first"), ("warm cache", "second")):
+            calls.clear()
+            memory = StandInMemory(session or "uncached", gemini_api_key="benchmark-placeholder",
+                                   cache=cache if session else None)
+            hits_before = cache.hits
+            started = time.perf_counter()
+            memory.embed_texts(texts)
+            elapsed = time.perf_counter() - started
+            hit_rate = (cache.hits - hits_before) / len(texts) if session else 0.0
+            print(f"{run:<22} {elapsed * 1000:>6.0f}ms {len(calls):>10} {hit_rate:>9.0%}")
+        print(f"disk usage: {cache.stats()['disk_bytes'] / 1024:.0f}KB")
+
+    vectors = [fake_vector(text) for text in texts[:50]]
+    print(f"\n{'format':<10} {'bytes/vector':>13} {'max cosine error':>17}")
+    print(f"{'json':<10} {len(json.dumps(vectors[0])):>13} {0.0:>17.1e}")
+    for dtype in ("float32", "float16"):
+        stored = [decode_vector(encode_vector(vector, dtype), dtype) for vector in vectors]
+        error = max(
+            abs(cosine(vectors[0], vector) - cosine(stored[0], stored_vector))
+            for vector, stored_vector in zip(vectors, stored)
+        )
+        print(f"{dtype:<10} {len(encode_vector(vectors[0], dtype)):>13} {error:>17.1e}")
+
+
+if __name__ == "__main__":
+    main()
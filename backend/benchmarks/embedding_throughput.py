@@ -0,0 +1,131 @@
+"""
+Embedding throughput of QdrantMemory against a local stand-in server.
+
+The stand-in speaks the Gemini REST embedding API (embedContent and
+batchEmbedContents) with a fixed per-request latency plus a small per-text
+cost, and can fail a share of requests with 503s. The SDK is pointed at it
+over the REST transport, so the timings include real HTTP round trips but no
+network.
+
+Compares the old one-call-per-text loop with batched, concurrent calls:
+
+    cd backend && python -m benchmarks.embedding_throughput [--texts 200] [--fail-rate 0.2]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks import _support  # noqa: F401  (sets up sys.path and env)
+
+DIMENSION = 768
+
+
+def make_handler(latency: float, per_text: float, fail_rate: float):
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    class EmbeddingHandler(BaseHTTPRequestHandler):
+        calls = 0
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests = body["requests"] if ":batchEmbedContents" in self.path else [body]
+            with lock:
+                EmbeddingHandler.calls += 1
+                failed = rng.random() < fail_rate
+            time.sleep(latency + per_text * len(requests))
+
+            if failed:
+                self._reply(503, {"error": {"code": 503, "message": "stand-in overload", "status": "UNAVAILABLE"}})
+                return
+            vectors = [{"values": [0.001 * (len(r["content"]["parts"][0]["text"]) % 97)] * DIMENSION} for r in requests]
+            if ":batchEmbedContents" in self.path:
+                self._reply(200, {"embeddings": vectors})
+            else:
+                self._reply(200, {"embedding": vectors[0]})
+
+        def _reply(self, code, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return EmbeddingHandler
+
+
+def serial_embeddings(texts):
+    """What generate_embeddings used to do: one blocking call per text."""
+    import google.generativeai as gemini_client
+
+    return [
+        gemini_client.embed_content(
+            model="models/embedding-001", content=text,
+            task_type="retrieval_document", title="StudentBuddy Context"
+        )["embedding"]
+        for text in texts
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.08, help="Seconds per request")
+    parser.add_argument("--per-text", type=float, default=0.001, help="Extra seconds per text in a request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger("app.ContextRetrieval.context_retrieval").setLevel(logging.ERROR)
+
+    import google.generativeai as gemini_client
+    from app.ContextRetrieval import context_retrieval
+    from app.ContextRetrieval.context_retrieval import QdrantMemory
+
+    handler = make_handler(args.latency, args.per_text, args.fail_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    memory = QdrantMemory(session_id="benchmark", gemini_api_key="benchmark-placeholder")
+    gemini_client.configure(
+        api_key="benchmark-placeholder", transport="rest",
+        client_options={"api_endpoint": f"http://127.0.0.1:{server.server_port}"}
+    )
+    context_retrieval.EMBEDDING_RETRY_DELAY = 0.05
+    texts = [f"Section {i}: " + "lorem ipsum dolor sit amet " * (20 + i % 30) for i in range(args.texts)]
+
+    print(f"{args.texts} texts, {args.latency * 1000:.0f}ms per request, "
+          f"batch size {context_retrieval.EMBEDDING_BATCH_SIZE}, "
+          f"concurrency {context_retrieval.EMBEDDING_CONCURRENCY}, fail rate {args.fail_rate:.0%}")
+    print(f"{'mode':<18} {'time':>8} {'texts/s':>9} {'requests':>9} {'failed':>7}")
+
+    if not args.skip_serial:
+        handler.calls = 0
+        started = time.perf_counter()
+        try:
+            serial_embeddings(texts)
+            failed = 0
+        except Exception:
+            failed = args.texts  # One error used to zero out every vector
+        elapsed = time.perf_counter() - started
+        print(f"{'serial per text':<18} {elapsed:>7.2f}s {args.texts / elapsed:>9.0f} {handler.calls:>9} {failed:>7}")
+
+    handler.calls = 0
+    started = time.perf_counter()
+    result = memory.embed_texts(texts)
+    elapsed = time.perf_counter() - started
+    print(f"{'batched':<18} {elapsed:>7.2f}s {args.texts / elapsed:>9.0f} {handler.calls:>9} {len(result.failed):>7}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Check that the API keeps serving unrelated requests while an LLM call is in
+flight.
+
+A slow /api/solve-doubt request is started and GET / is polled every 50ms
+until it finishes. With the async LLM path the pings stay fast; with
+``--blocking`` the stand-in model sleeps on the event loop (what the old
+``llm.invoke`` call did) and the pings stall for the whole round-trip.
+
+    cd backend && python -m benchmarks.event_loop_responsiveness [--blocking]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._support import install_fake_llm
+
+LLM_LATENCY = 2.0
+
+
+async def run(blocking: bool):
+    import httpx
+    from app.main import app
+    from app import models
+    from app.auth import security
+
+    user = models.User(id=1, username="benchmark", email="benchmark@example.com", is_active=True)
+    app.dependency_overrides[security.get_current_active_user] = lambda: user
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        doubt = asyncio.create_task(
+            client.post("/api/solve-doubt", data={"question": "What is a stack?"})
+        )
+        await asyncio.sleep(0)
+
+        latencies = []
+        while not doubt.done():
+            started = time.perf_counter()
+            await client.get("/")
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.05)
+
+        response = await doubt
+
+    print(f"mode: {'blocking invoke' if blocking else 'async ainvoke'}")
+    print(f"solve-doubt status: {response.status_code}")
+    print(f"pings served during the LLM call: {len(latencies)}")
+    if latencies:
+        print(f"max ping latency: {max(latencies) * 1000:.1f} ms")
+
+    if not blocking:
+        assert len(latencies) > 10, "event loop was blocked by the LLM call"
+        assert max(latencies) < LLM_LATENCY / 2, "a ping waited for the LLM call"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--blocking", action="store_true",
+                            help="simulate the old synchronous llm.invoke path")
+    args = arg_parser.parse_args()
+
+    install_fake_llm(latency=LLM_LATENCY, blocking=args.blocking)
+    asyncio.run(run(args.blocking))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Per-request LLM setup cost before and after the shared client registry.
+
+"before" repeats what every request used to do: load_dotenv() and build a
+fresh ChatGoogleGenerativeAI client. "after" constructs LLMConfig and
+QuizGenerator the way the endpoints do now, reusing registry clients. No
+network calls are made; only object construction is timed.
+
+    cd backend && python -m benchmarks.llm_setup [--iterations 200]
+"""
+import argparse
+import time
+
+from benchmarks import _support  # noqa: F401  (sets a placeholder API key)
+
+
+def timed(label, fn, iterations):
+    fn()  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - started) / iterations
+    print(f"{label:<45} {per_call * 1000:8.3f} ms/request")
+    return per_call
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--iterations", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    from dotenv import load_dotenv
+    from langchain.prompts import PromptTemplate
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from app.llm.config import LLMConfig
+    from app.quiz.quiz_generator import Quiz, QuizList, QuizGenerator
+
+    def old_llm_config():
+        load_dotenv()
+        ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7, max_tokens=1024)
+
+    def old_quiz_generator():
+        load_dotenv()
+        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.2, max_tokens=4096)
+        for model in (Quiz, QuizList):
+            parser = JsonOutputParser(pydantic_object=model)
+            prompt = PromptTemplate(
+                template="Answer the user query.\n{format_instructions}\n{query}\n",
+                input_variables=["query"],
+                partial_variables={"format_instructions": parser.get_format_instructions()},
+            )
+            prompt | llm | parser
+
+    before = timed("before: load_dotenv + new client (doubt)", old_llm_config, args.iterations)
+    after = timed("after: LLMConfig() from registry (doubt)", LLMConfig, args.iterations)
+    print(f"{'speed-up':<45} {before / after:8.1f}x")
+
+    before = timed("before: new client + chain (quiz)", old_quiz_generator, args.iterations)
+    after = timed("after: QuizGenerator() from registry (quiz)", QuizGenerator, args.iterations)
+    print(f"{'speed-up':<45} {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
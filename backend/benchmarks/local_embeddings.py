@@ -0,0 +1,68 @@
+"""
+Throughput and retrieval quality of the offline HashingEmbedder.
+
+Encodes syllabus sections from app/uploads (repeated to ``--texts``) one
+text per call and in batches, and reports texts/sec. Retrieval is checked
+by querying with an 8-word phrase from the middle of each distinct section
+and counting how often that section ranks first (recall@1).
+
+    cd backend && python -m benchmarks.local_embeddings [--texts 5000]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from benchmarks._support import UPLOADS_DIR
+
+
+def load_sections():
+    from app.document_parser import DocumentParserFactory
+
+    source = UPLOADS_DIR / "R20_CSM_FINAL_SYLLABUS_6.0.pdf"
+    parser = DocumentParserFactory.create_parser(str(source), max_section_length=1000)
+    sections = {section.content for section in parser.parse(str(source))}
+    return sorted(sections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024])
+    args = parser.parse_args()
+
+    from app.ContextRetrieval.local_embeddings import HashingEmbedder
+
+    sections = load_sections()
+    texts = [sections[i % len(sections)] for i in range(args.texts)]
+    words = sum(len(text.split()) for text in texts) / len(texts)
+    print(f"{args.texts} texts, {words:.0f} words on average")
+    print(f"{'batch size':>10} {'time':>8} {'texts/s':>9}")
+
+    for batch_size in args.batch_sizes:
+        embedder = HashingEmbedder()  # Fresh feature table each run
+        started = time.perf_counter()
+        for start in range(0, len(texts), batch_size):
+            embedder.encode(texts[start:start + batch_size])
+        elapsed = time.perf_counter() - started
+        print(f"{batch_size:>10} {elapsed:>7.2f}s {len(texts) / elapsed:>9.0f}")
+
+    rng = random.Random(0)
+    embedder = HashingEmbedder()
+    matrix = embedder.encode(sections)
+    queries, expected = [], []
+    for index, section in enumerate(sections):
+        section_words = section.split()
+        if len(section_words) < 30:
+            continue
+        start = rng.randrange(10, len(section_words) - 10)
+        queries.append(" ".join(section_words[start:start + 8]))
+        expected.append(index)
+    scores = embedder.encode(queries) @ matrix.T
+    recall = float(np.mean(np.argmax(scores, axis=1) == np.asarray(expected)))
+    print(f"\nrecall@1 over {len(queries)} sections: {recall:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare the old serial OCR path with the concurrent, compressed one.
+
+The old path rendered each page to a default-resolution PNG and awaited one
+OCR call at a time. The new path renders in the worker pool, compresses to
+grayscale JPEG and keeps OCR_CONCURRENCY calls in flight. The LLM is the
+local stand-in with a fixed latency, so the timing shows the pipeline and
+the payload column shows what would be uploaded to the model.
+
+    cd backend && python -m benchmarks.ocr_pipeline [--latency 1.0] [--pages 40]
+"""
+import argparse
+import asyncio
+import base64
+import time
+
+from benchmarks._support import install_fake_llm, sample_pdfs
+
+
+async def serial_ocr(ocr, file_path, pages):
+    """The pre-change aextract_text_from_file: PNG pages, one call at a time."""
+    import fitz
+    from langchain_core.messages import HumanMessage
+
+    started = time.perf_counter()
+    doc = fitz.open(file_path)
+    try:
+        images = [doc.load_page(page_num).get_pixmap().tobytes("png") for page_num in range(pages)]
+    finally:
+        doc.close()
+
+    payload = 0
+    full_text = []
+    for image_bytes in images:
+        image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+        payload += len(image_b64)
+        message = HumanMessage(content=[
+            {"type": "text", "text": "Extract all text from this page."},
+            {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}}
+        ])
+        full_text.append((await ocr.llm.ainvoke([message])).content)
+    return full_text, payload, time.perf_counter() - started
+
+
+async def concurrent_ocr(ocr, file_path, pages):
+    from app.ocr import render_page_images
+
+    started = time.perf_counter()
+    texts = await ocr.aextract_pages(file_path, range(pages))
+    elapsed = time.perf_counter() - started
+    # Rendered again only to measure the payload, outside the timing
+    payload = sum(len(base64.b64encode(page.image)) for page in render_page_images(file_path, range(pages)))
+    return texts, payload, elapsed
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--latency", type=float, default=1.0)
+    arg_parser.add_argument("--pages", type=int, default=40)
+    args = arg_parser.parse_args()
+
+    install_fake_llm(latency=args.latency)
+    from app.document_parser import shutdown_parse_pool
+    from app.ocr import OCR, OCR_CONCURRENCY, page_count
+
+    ocr = OCR(cache=None)  # Measure the pipeline, not the OCR cache
+    path = max(sample_pdfs(), key=page_count)
+    pages = min(args.pages, page_count(path))
+    print(f"{path.name}: {pages} pages, {args.latency}s per OCR call, concurrency {OCR_CONCURRENCY}")
+
+    try:
+        for label, run in (("serial PNG", serial_ocr), ("concurrent JPEG", concurrent_ocr)):
+            texts, payload, elapsed = await run(ocr, str(path), pages)
+            print(f"{label:<16} {elapsed:>7.2f}s  payload {payload / 1024 / 1024:>6.2f}MB  pages {len(texts)}")
+    finally:
+        shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
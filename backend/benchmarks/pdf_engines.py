@@ -0,0 +1,71 @@
+"""
+Compare the PDF text engines (pages/sec and peak RSS) on the sample PDFs.
+
+Each engine runs in its own subprocess so that its peak RSS is not mixed up
+with the other engine's allocations.
+
+    cd backend && python -m benchmarks.pdf_engines [--repeat 3]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from benchmarks._support import BACKEND_DIR, peak_rss_mb, sample_pdfs
+
+
+def run_engine(engine_name, repeat):
+    """Extract every sample PDF with one engine; runs inside the subprocess."""
+    from app.document_parser import get_pdf_engine
+
+    engine = get_pdf_engine(engine_name)
+    results = []
+    for path in sample_pdfs():
+        pages = engine.page_count(str(path))
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _page in engine.iter_pages(str(path), 0, pages):
+                pass
+            timings.append(time.perf_counter() - started)
+        results.append({"file": path.name, "pages": pages, "seconds": min(timings)})
+    return {"engine": engine.name, "files": results, "peak_rss_mb": peak_rss_mb()}
+
+
+def measure(engine_name, repeat):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.pdf_engines", "--child", engine_name, "--repeat", str(repeat)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_engine(args.child, args.repeat)))
+        return
+
+    runs = [measure(name, args.repeat) for name in ("pypdf2", "pymupdf")]
+    if runs[1]["engine"] != "pymupdf":
+        print("PyMuPDF is not installed; only PyPDF2 was measured")
+        runs = runs[:1]
+
+    print(f"{'file':<40} {'pages':>5} " + " ".join(f"{run['engine'] + ' p/s':>13}" for run in runs))
+    for index, entry in enumerate(runs[0]["files"]):
+        rates = [run["files"][index]["pages"] / run["files"][index]["seconds"] for run in runs]
+        print(f"{entry['file'][:40]:<40} {entry['pages']:>5} " + " ".join(f"{rate:>13.1f}" for rate in rates))
+
+    for run in runs:
+        pages = sum(entry["pages"] for entry in run["files"])
+        seconds = sum(entry["seconds"] for entry in run["files"])
+        print(f"{run['engine']:<8} total {pages / seconds:>8.1f} pages/s, peak RSS {run['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
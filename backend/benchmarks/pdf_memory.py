@@ -0,0 +1,81 @@
+"""
+Peak RSS of PDF parsing as the page count grows.
+
+Generates text PDFs of increasing length, then streams PDFParser.iter_sections
+over each one in a fresh subprocess (one per engine and size). "growth" is
+the peak RSS above the RSS after imports and opening the document, which is
+what has to stay flat for 500-page textbooks not to get workers OOM-killed.
+
+    cd backend && python -m benchmarks.pdf_memory [--pages 100 400 1600]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._support import BACKEND_DIR, peak_rss_mb
+
+LINE = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.\n"
+
+
+def make_pdf(path, pages):
+    import fitz
+
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), f"Page {page_number + 1}\n" + LINE * 50, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def run_child(engine, file_path):
+    from app.document_parser import PDFParser
+
+    parser = PDFParser(engine=engine, use_ocr=False, parallel=False)
+    parser._page_count(file_path)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    sections = sum(1 for _ in parser.iter_sections(file_path))
+    return {
+        "seconds": time.perf_counter() - started,
+        "sections": sections,
+        "growth_mb": peak_rss_mb() - baseline
+    }
+
+
+def measure(engine, file_path):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.pdf_memory", "--child", engine, str(file_path)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pages", type=int, nargs="+", default=[100, 400, 1600])
+    arg_parser.add_argument("--engines", nargs="+", default=["pymupdf", "pypdf2"])
+    arg_parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return
+
+    print(f"{'pages':>6} {'engine':<8} {'time':>8} {'growth':>8} {'sections':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for pages in args.pages:
+            path = Path(tmp_dir) / f"pages_{pages}.pdf"
+            make_pdf(path, pages)
+            for engine in args.engines:
+                result = measure(engine, path)
+                print(f"{pages:>6} {engine:<8} {result['seconds']:>7.2f}s {result['growth_mb']:>6.1f}MB "
+                      f"{result['sections']:>8}")
+
+
+if __name__ == "__main__":
+    main()
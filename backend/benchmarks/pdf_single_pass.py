@@ -0,0 +1,73 @@
+"""
+Compare the old double-read PDF parse with the single-pass PDFParser.parse.
+
+The old path ran is_likely_scanned_pdf (open + extract_text on every page)
+and then opened the PDF again and extracted every page a second time. The
+baseline below reproduces that; the new path is PDFParser.parse with OCR
+disabled, since the baseline never OCRs scanned pages.
+
+    cd backend && python -m benchmarks.pdf_single_pass [--repeat 3]
+"""
+import argparse
+import time
+
+import PyPDF2
+
+from benchmarks._support import sample_pdfs
+
+
+def double_pass_parse(parser, file_path):
+    """The pre-change PDFParser.parse: scanned check, then a second full read."""
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        total_text = ""
+        for page in reader.pages:
+            text = page.extract_text()
+            if text:
+                total_text += text.strip()
+
+    sections = []
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page in reader.pages:
+            text = page.extract_text()
+            if not text.strip():
+                return []
+            sections.extend(parser._split_into_sections(text))
+    return sections
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    from app.document_parser import PDFParser
+
+    # OCR off: the baseline only extracts text, so both sides do the same work
+    parser = PDFParser(max_section_length=1000, use_ocr=False)
+    total_before = total_after = 0.0
+
+    print(f"{'file':<40} {'pages':>5} {'double':>9} {'single':>9} {'saved':>6}")
+    for path in sample_pdfs():
+        pages = len(PyPDF2.PdfReader(str(path)).pages)
+        before = best_of(lambda: double_pass_parse(parser, str(path)), args.repeat)
+        after = best_of(lambda: parser.parse(str(path)), args.repeat)
+        total_before += before
+        total_after += after
+        print(f"{path.name[:40]:<40} {pages:>5} {before:>8.3f}s {after:>8.3f}s {1 - after / before:>6.0%}")
+
+    print(f"{'total':<40} {'':>5} {total_before:>8.3f}s {total_after:>8.3f}s {1 - total_after / total_before:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
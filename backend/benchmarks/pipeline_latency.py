@@ -0,0 +1,99 @@
+"""
+End-to-end quiz latency: parse-then-generate vs the overlapped pipeline.
+
+Builds a 50-page PDF from the sample syllabus in app/uploads and runs it
+through a stand-in LLM with a fixed latency. The sequential path parses the
+whole document before generating; the pipelined path feeds
+DocumentParser.aiter_sections into QuizGenerator.iterQuizzesFromStream.
+The pipelined time should approach max(parse, generate) rather than their sum.
+
+    cd backend && python -m benchmarks.pipeline_latency [--pages 50] [--latency 0.25]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from contextlib import aclosing
+from pathlib import Path
+
+import PyPDF2
+
+from benchmarks._support import UPLOADS_DIR, install_fake_llm
+
+SOURCE_PDF = UPLOADS_DIR / "R20_CSM_FINAL_SYLLABUS_6.0.pdf"
+
+
+def build_sample(pages: int, target: Path):
+    reader = PyPDF2.PdfReader(str(SOURCE_PDF))
+    writer = PyPDF2.PdfWriter()
+    for index in range(pages):
+        writer.add_page(reader.pages[index % len(reader.pages)])
+    with target.open("wb") as file:
+        writer.write(file)
+
+
+async def sequential(parser, generator, path, args):
+    sections = await asyncio.to_thread(parser.parse, str(path))
+    await generator.generateQuizzes([s.content for s in sections], N=3, concurrency=args.concurrency)
+    return len(sections)
+
+
+async def pipelined(parser, generator, path, args):
+    count = 0
+    async with aclosing(generator.iterQuizzesFromStream(
+        parser.aiter_sections(str(path)), N=3, concurrency=args.concurrency
+    )) as results:
+        async for _ in results:
+            count += 1
+    return count
+
+
+async def run(args, path):
+    from app.document_parser import PDFParser
+    from app.quiz.quiz_generator import QuizGenerator
+
+    parser = PDFParser(max_section_length=1000, parallel=False)
+    generator = QuizGenerator()
+
+    started = time.perf_counter()
+    sections = await asyncio.to_thread(parser.parse, str(path))
+    parse_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await generator.generateQuizzes([s.content for s in sections], N=3, concurrency=args.concurrency)
+    generate_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await sequential(parser, generator, path, args)
+    sequential_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await pipelined(parser, generator, path, args)
+    pipelined_time = time.perf_counter() - started
+
+    print(f"pages: {args.pages}, sections: {len(sections)}, "
+          f"LLM latency: {args.latency}s, concurrency: {args.concurrency}")
+    print(f"parse only            {parse_time:7.2f}s")
+    print(f"generate only         {generate_time:7.2f}s")
+    print(f"max(parse, generate)  {max(parse_time, generate_time):7.2f}s")
+    print(f"sum(parse, generate)  {parse_time + generate_time:7.2f}s")
+    print(f"sequential            {sequential_time:7.2f}s")
+    print(f"pipelined             {pipelined_time:7.2f}s")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pages", type=int, default=50)
+    arg_parser.add_argument("--latency", type=float, default=0.25)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    install_fake_llm(latency=args.latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sample.pdf"
+        build_sample(args.pages, path)
+        asyncio.run(run(args, path))
+
+
+if __name__ == "__main__":
+    main()
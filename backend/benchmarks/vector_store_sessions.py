@@ -0,0 +1,127 @@
+"""
+Memory and search latency of session context with many sessions alive.
+
+Compares the old layout, where every session had its own in-memory Qdrant
+client and collection, with the shared on-disk store that filters by
+session id in the embedded store. Each mode runs in a fresh subprocess. After indexing
+``--sections`` chunks for each of ``--sessions`` sessions, it issues
+``--queries`` searches from ``--threads`` threads, each for a random
+session, and reports RSS growth and search latency.
+
+    cd backend && python -m benchmarks.vector_store_sessions [--sessions 1000]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._support import BACKEND_DIR, peak_rss_mb
+
+DIMENSION = 768
+
+
+def vectors(rng, count):
+    return [[rng.uniform(-1, 1) for _ in range(DIMENSION)] for _ in range(count)]
+
+
+def run_child(mode, sessions, sections, queries, threads):
+    import logging
+    logging.getLogger("app.ContextRetrieval.context_retrieval").setLevel(logging.ERROR)
+    from qdrant_client import QdrantClient, models
+    from app.ContextRetrieval.context_retrieval import QdrantMemory
+
+    rng = random.Random(0)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+
+    if mode == "per-session":
+        stores = []
+        for session in range(sessions):
+            client = QdrantClient(location=":memory:")
+            name = f"temp_collection_{session}"
+            client.create_collection(name, vectors_config=models.VectorParams(size=DIMENSION, distance=models.Distance.COSINE))
+            client.upsert(name, points=[
+                models.PointStruct(id=i, vector=vector, payload={"text": f"section {i}", "index": i})
+                for i, vector in enumerate(vectors(rng, sections))
+            ])
+            stores.append((client, name))
+
+        def search(session, query):
+            client, name = stores[session]
+            return client.query_points(name, query=query, limit=5).points
+    else:
+        class StandInMemory(QdrantMemory):
+            def _embed_batch(self, texts, task_type):
+                return vectors(rng, len(texts))
+
+        stores = []
+        for session in range(sessions):
+            memory = StandInMemory(f"session-{session}", gemini_api_key="benchmark-placeholder", cache=None,
+                                   user_id=session % 100, document_id=f"doc-{session}")
+            memory.add_context([f"section {i} of session {session}" for i in range(sections)])
+            stores.append(memory)
+
+        def search(session, query):
+            return stores[session].search(query, limit=5)
+
+    build_seconds = time.perf_counter() - started
+    query_vectors = vectors(rng, queries)
+    targets = [rng.randrange(sessions) for _ in range(queries)]
+
+    def timed(args):
+        session, query = args
+        begin = time.perf_counter()
+        results = search(session, query)
+        assert len(results) == min(5, sections)
+        return time.perf_counter() - begin
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(timed, zip(targets, query_vectors)))
+
+    return {
+        "build_seconds": build_seconds,
+        "growth_mb": peak_rss_mb() - baseline,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--modes", nargs="+", default=["per-session", "shared"])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.sessions, args.sections, args.queries, args.threads)))
+        return
+
+    print(f"{args.sessions} sessions x {args.sections} sections, {args.queries} searches from {args.threads} threads")
+    print(f"{'mode':<12} {'build':>8} {'rss growth':>11} {'p50':>8} {'p95':>8}")
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as store_dir:
+            env = dict(os.environ, VECTOR_STORE_PATH=os.path.join(store_dir, "vectors.sqlite3"))
+            env.pop("QDRANT_URL", None)
+            output = subprocess.run(
+                [sys.executable, "-W", "ignore", "-m", "benchmarks.vector_store_sessions", "--child", mode,
+                 "--sessions", str(args.sessions), "--sections", str(args.sections),
+                 "--queries", str(args.queries), "--threads", str(args.threads)],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<12} {result['build_seconds']:>7.1f}s {result['growth_mb']:>9.1f}MB "
+              f"{result['p50_ms']:>6.1f}ms {result['p95_ms']:>6.1f}ms")
+
+
+if __name__ == "__main__":
+    main()